@@ -3,6 +3,9 @@ Configuration file for the RL filling control system.
 Contains all default parameters for training, testing, and real-world operation.
 """
 
+import functools
+import os
+
 # Data and file paths
 DATA_FILE_PATH = "/Users/ege.buyukustun/source/repos/reinforcement-learning/data/data_v4/FULL_DATA.xlsx"
 
@@ -47,19 +50,59 @@ DEFAULT_UDP_PORT = 5297
 DEFAULT_MODBUS_IP = "192.168.0.22"
 DEFAULT_MODBUS_PORT = 502
 DEFAULT_MODBUS_REGISTER = 40530
+UDP_MAX_DATAGRAM_SIZE = 65535  # Read whole datagrams in one call; smaller reads silently truncate them
+RECEIVE_BUFFER_SIZE = 1 << 16  # Initial per-episode receive buffer in bytes; doubled when an episode outgrows it
+RECEIVE_MAX_RETRIES = 5  # Empty receives tolerated per episode before it is counted as failed
+RECEIVE_RETRY_BACKOFF = 0.5  # Initial wait in seconds between empty receives, doubled after each retry
+RECEIVE_RETRY_BACKOFF_MAX = 8.0  # Upper bound for the retry wait in seconds
 
 # Database configuration for saving real episodes
-DEFAULT_DB_CONFIG = {
-    "name": "reinforcement_learning_db",
-    "user": "root", 
-    "password": "1ege.9ege",
-    "host": "127.0.0.1",
-    "port": 3306
-}
+# Read lazily from the environment so no credentials live in this module
+@functools.lru_cache(maxsize=None)
+def get_db_config() -> dict:
+    """Return database settings from DB_* environment variables (local dev defaults otherwise)."""
+    return {
+        "name": os.environ.get("DB_NAME", "reinforcement_learning_db"),
+        "user": os.environ.get("DB_USER", "root"),
+        "password": os.environ.get("DB_PASSWORD", ""),
+        "host": os.environ.get("DB_HOST", "127.0.0.1"),
+        "port": int(os.environ.get("DB_PORT", "3306"))
+    }
+
+# Q-value reports written by agent testing: Parquet is streamed per episode when pyarrow is
+# installed; the Excel workbook is built from the full history once testing stops
+EXCEL_REPORT_ENABLED = True
+
+# Q-table snapshot precision for the text and Parquet outputs: 'fp32' writes values as they
+# are, 'int8' writes 8-bit codes with a per-table scale and zero point (the live agent
+# Q-table is never quantized)
+Q_TABLE_QUANT = 'fp32'
+
+# Episodes waiting for the background database writer; the oldest is dropped when full
+DB_WRITE_QUEUE_SIZE = 4096
+
+# CPU pinning for real-world testing (Linux only, opt-in). Set RL_IO_CORE to the core for
+# the device I/O loop (UDP receive, Modbus send, agent update) and RL_DB_WRITER_CORE to a
+# different core for the database writer thread. For the lowest receive latency, keep the
+# NIC interrupts on the I/O core too: stop irqbalance (or ban that IRQ in it) and write the
+# core mask to /proc/irq/<N>/smp_affinity for the NIC queue's IRQ.
+@functools.lru_cache(maxsize=None)
+def get_cpu_pinning() -> dict:
+    """Return {'io_core', 'db_writer_core'} from the environment; None leaves a thread unpinned."""
+    def core(name):
+        value = os.environ.get(name)
+        return int(value) if value else None
+    return {"io_core": core("RL_IO_CORE"), "db_writer_core": core("RL_DB_WRITER_CORE")}
+
+IO_THREAD_NICE = -5  # Niceness increment for the pinned I/O loop; only applied when running as root
 
 # Real-world device parameters
 DEFAULT_WEIGHT_QUANTIZATION_STEP = 10000    # For converting real weights to model format (multiply simulation values by this)
 DEFAULT_TCP_TIMEOUT = 0 # 100ms timeout for TCP communication
+TCP_NODELAY_ENABLED = True  # Disable Nagle so short device messages are not held back
+TCP_SOCKET_BUFFER_SIZE = 4 * 1024 * 1024  # SO_RCVBUF/SO_SNDBUF in bytes, sized for bursty episodes
+TCP_QUICKACK_ENABLED = True  # Linux only: ACK immediately instead of delaying
+TCP_BUSY_POLL_US = 50  # Linux only: SO_BUSY_POLL in microseconds (0 to leave unset)
 DEFAULT_TESTING_EPISODES = 10
 
 # Note: Uses DEFAULT_SAFE_WEIGHT_MIN/MAX * DEFAULT_WEIGHT_QUANTIZATION_STEP for real device tolerance
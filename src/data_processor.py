@@ -5,7 +5,7 @@ Handles loading and preprocessing of filling session data.
 
 import pandas as pd
 import numpy as np
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Union
 # Hardcoded special tokens
 SWITCH_TOKEN = -1
 TERMINATION_TOKEN = 300
@@ -14,39 +14,59 @@ TERMINATION_TOKEN = 300
 class FillingSession:
     """Represents a single container filling session with extracted metadata."""
     
-    def __init__(self, session_id: str, weight_sequence: List[int]):
+    __slots__ = ('session_id', 'weight_sequence', 'switch_point', 'final_weight', 'episode_length')
+    
+    def __init__(self, session_id: str = "", weight_sequence: Optional[List[int]] = None):
+        self.session_id = session_id
+        self.weight_sequence = weight_sequence if weight_sequence is not None else []
+        self._extract_metadata()
+    
+    def reset(self, session_id: str, weight_sequence: Union[List[int], np.ndarray]) -> 'FillingSession':
+        """
+        Overwrite this session in place; the weight sequence is taken over, not copied.
+        
+        Besides a list, weight_sequence may be an integer array such as the real-world
+        parser's int32 weight sequence, so no per-episode list has to be built.
+        """
         self.session_id = session_id
         self.weight_sequence = weight_sequence
+        self._extract_metadata()
+        return self
+    
+    def _extract_metadata(self) -> None:
+        """Derive switch point, final weight and episode length from the weight sequence."""
         self.switch_point = self._extract_switch_point()
         self.final_weight = self._extract_final_weight()
         self.episode_length = self._calculate_episode_length()
     
-    def _extract_switch_point(self) -> Optional[int]:
-        """Extract the switching point (last fast-mode weight)."""
+    def _index_of(self, token: int) -> Optional[int]:
+        """Index of the first occurrence of token in the weight sequence (list or array), or None."""
+        if isinstance(self.weight_sequence, np.ndarray):
+            indices = np.flatnonzero(self.weight_sequence == token)
+            return int(indices[0]) if indices.size else None
         try:
-            switch_index = self.weight_sequence.index(SWITCH_TOKEN)
-            if switch_index > 0:
-                return self.weight_sequence[switch_index - 1]
+            return self.weight_sequence.index(token)
         except ValueError:
-            pass
+            return None
+    
+    def _extract_switch_point(self) -> Optional[int]:
+        """Extract the switching point (last fast-mode weight)."""
+        switch_index = self._index_of(SWITCH_TOKEN)
+        if switch_index:
+            return int(self.weight_sequence[switch_index - 1])
         return None
     
     def _extract_final_weight(self) -> Optional[int]:
         """Extract the final weight (value before termination)."""
-        try:
-            termination_index = self.weight_sequence.index(TERMINATION_TOKEN)
-            if termination_index > 0:
-                return self.weight_sequence[termination_index - 1]
-        except ValueError:
-            pass
+        termination_index = self._index_of(TERMINATION_TOKEN)
+        if termination_index:
+            return int(self.weight_sequence[termination_index - 1])
         return None
     
     def _calculate_episode_length(self) -> int:
         """Calculate the total episode length (steps until termination)."""
-        try:
-            return self.weight_sequence.index(TERMINATION_TOKEN)
-        except ValueError:
-            return len(self.weight_sequence)
+        termination_index = self._index_of(TERMINATION_TOKEN)
+        return termination_index if termination_index is not None else len(self.weight_sequence)
     
     def is_valid(self) -> bool:
         """Check if the session has valid switch point and final weight."""
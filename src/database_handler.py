@@ -5,7 +5,7 @@ Database handler for saving real-world filling episodes.
 import logging
 import json
 from typing import Dict, Any, Optional, List
-from config import DEFAULT_DB_CONFIG
+from config import get_db_config
 
 try:
     import mysql.connector
@@ -26,7 +26,7 @@ class DatabaseHandler:
         Args:
             db_config: Database configuration dictionary
         """
-        self.config = db_config or DEFAULT_DB_CONFIG.copy()
+        self.config = db_config or dict(get_db_config())
         self.connection = None
         
         if not MYSQL_AVAILABLE:
@@ -180,6 +180,8 @@ class DatabaseHandler:
             # Convert weight sequence to string
             if isinstance(weight_sequence, list):
                 raw_data = ','.join(map(str, weight_sequence))
+            elif hasattr(weight_sequence, 'tolist'):  # numpy array
+                raw_data = ','.join(map(str, weight_sequence.tolist()))
             else:
                 raw_data = str(weight_sequence)
                 
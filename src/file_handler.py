@@ -1,19 +1,464 @@
 import pandas as pd
+import numpy as np
 import webbrowser
 import os
 import logging
+from itertools import chain, islice
+from operator import attrgetter
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
+from openpyxl.writer.excel import ExcelWriter
+from zipfile import ZipFile, ZIP_DEFLATED
+
+from xlsx_stream import LXML_AVAILABLE, column_letter, write_xlsx
+from config import Q_TABLE_QUANT
+
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+    # Q-değeri Parquet dosyalarının uzun biçimli şeması: her satır bir (bölüm, ağırlık) çifti
+    QVALUE_PARQUET_SCHEMA = pa.schema([
+        ('episode_num', pa.int64()),
+        ('termination_type', pa.string()),
+        ('weight', pa.float64()),
+        ('q_value', pa.float64()),
+        ('is_experienced', pa.bool_()),
+    ])
+    # 'int8' nicemlemede q_value 8 bitlik koddur; bölüm başına ölçek ve sıfır noktası
+    # ayrı sütunlarda tutulur (bkz. dequantize_q_values)
+    QVALUE_PARQUET_SCHEMA_INT8 = pa.schema([
+        ('episode_num', pa.int64()),
+        ('termination_type', pa.string()),
+        ('weight', pa.float64()),
+        ('q_value', pa.uint8()),
+        ('q_scale', pa.float64()),
+        ('q_zero_point', pa.float64()),
+        ('is_experienced', pa.bool_()),
+    ])
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# --- Stiller ---
+# Stil nesneleri modül seviyesinde bir kez oluşturulur ve hücrelere referansla atanır
+BOLD_FONT = Font(bold=True, size=12)
+CENTER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+THIN_SIDE = Side(style='thin', color='000000')
+THICK_SIDE = Side(style='thick', color='000000')
+# Dolgular stil tanımlayıcılarında adlarıyla anılır; böylece tanımlayıcılar openpyxl
+# nesnesi içermez ve süreçler arasında taşınabilir
+FILL_COLORS = {
+    'light_gray': "DDDDDD",
+    'dark_gray': "999999",
+    'silver': "C0C0C0",
+    'dim_gray': "696969",
+    'highlight': "FFFF00",
+    'green': "C6EFCE",
+    'yellow': "FFEB9C",
+    'red': "FFC7CE",
+}
+FILLS = {
+    name: PatternFill(start_color=color, end_color=color, fill_type="solid")
+    for name, color in FILL_COLORS.items()
+}
+TERMINATION_FILLS = {"Normal": 'green', "Underflow": 'yellow', "Overflow": 'red'}
+
+# Bölüm çerçevesindeki dokuz kenarlık kombinasyonu: dış kenarlar kalın, iç çizgiler ince.
+# Anahtar (satır konumu, sütun konumu); satır 'top'/'mid'/'bot', sütun 'left'/'mid'/'right'
+BORDERS = {
+    (r, c): Border(
+        top=THICK_SIDE if r == 'top' else THIN_SIDE,
+        bottom=THICK_SIDE if r == 'bot' else THIN_SIDE,
+        left=THICK_SIDE if c == 'left' else THIN_SIDE,
+        right=THICK_SIDE if c == 'right' else THIN_SIDE
+    )
+    for r in ('top', 'mid', 'bot')
+    for c in ('left', 'mid', 'right')
+}
+
+# write_to_text için dosya tamponu (1 MiB) ve tek seferde birleştirilen satır sayısı
+TEXT_WRITE_BUFFER_SIZE = 1024 * 1024
+TEXT_WRITE_CHUNK_SIZE = 65536
+
+# .xlsx arşivi için DEFLATE seviyesi; metin ağırlıklı XML'de 1. seviye varsayılan 6'ya yakın
+# sıkıştırırken çok daha hızlıdır
+XLSX_COMPRESSLEVEL = 1
+
+# QValueParquetWriter'ın tek satır grubunda biriktirdiği bölüm sayısı
+PARQUET_ROW_GROUP_EPISODES = 32
+
+# Bölüm başlığı altındaki bilgi satırları
+HEADER_LABELS = ("Experienced", "Model-Selected", "Explored", "Result", "Total Time", "Total Weight")
+
+
+@dataclass(slots=True, frozen=True)
+class EpisodeInfo:
+    """
+    Tek bir bölümün rapora yazılan bilgileri.
+
+    Sözlük yerine slots kullanan bir dataclass olduğundan alan erişimi daha hızlıdır
+    ve bellekte tutulan uzun bölüm listelerinde daha az yer kaplar.
+    """
+    episode_num: int
+    switch_point: float
+    model_selected_switching_point: float
+    explored_switching_point: Optional[float]
+    termination_type: str
+    total_time: float
+    final_weight: float
+    q_value: Dict[float, float]
+    episode_length: int = 0
+    exploration_rate: float = 0.0
+    # True ise q_value yalnızca önceki bölümden bu yana değişen girdileri içerir
+    q_value_is_delta: bool = False
+
+
+def _as_episode_info(info):
+    """Eski sözlük biçimindeki bölüm bilgisini EpisodeInfo'ya çevirir; EpisodeInfo aynen döner."""
+    if isinstance(info, EpisodeInfo):
+        return info
+    return EpisodeInfo(
+        episode_num=info['episode_num'],
+        switch_point=info['switch_point'],
+        model_selected_switching_point=info['model_selected_switching_point'],
+        explored_switching_point=info['explored_switching_point'],
+        termination_type=info.get('termination_type', 'Normal'),
+        total_time=info['total_time'],
+        final_weight=info['final_weight'],
+        q_value=info['q_value'],
+        episode_length=info.get('episode_length', 0),
+        exploration_rate=info.get('exploration_rate', 0.0),
+        q_value_is_delta=info.get('q_value_is_delta', False)
+    )
+
+
+# Bölüm başlık alanlarını tek bir C seviyesi çağrıda demet olarak okur
+EPISODE_HEADER_FIELDS = attrgetter(
+    'episode_num', 'switch_point', 'model_selected_switching_point', 'explored_switching_point',
+    'termination_type', 'total_time', 'final_weight'
+)
+
+
+@dataclass
+class EpisodeColumns:
+    """
+    Bölüm bilgilerinin sütun tabanlı (SoA) gösterimi.
+
+    Her alan bölüm başına bir değer tutar; Q-değerleri tüm bölümlerin ortak
+    ağırlık ekseni üzerinde (ağırlık x bölüm) 2 boyutlu bir dizidir.
+    """
+    episode_nums: np.ndarray
+    switch_points: np.ndarray
+    model_selected_switching_points: np.ndarray
+    explored_switching_points: np.ndarray  # Keşif yapılmayan bölümler için NaN
+    termination_types: np.ndarray
+    total_times: np.ndarray
+    final_weights: np.ndarray
+    weights: np.ndarray
+    q_values: np.ndarray  # Bölümde bulunmayan ağırlıklar için NaN
+
+    def __len__(self):
+        return len(self.episode_nums)
+
+
+def _to_float_array(values):
+    """None değerlerini NaN olarak float64 dizisine çevirir."""
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+
+def _episodes_to_soa(all_episodes_info):
+    """EpisodeInfo (veya eski biçimdeki sözlük) listesini EpisodeColumns yapısına çevirir."""
+    all_episodes_info = [_as_episode_info(info) for info in all_episodes_info]
+
+    # Ortak ağırlık ekseni: tüm Q-tablolarındaki anahtarların sıralı birleşimi
+    weights = np.unique(np.fromiter(
+        (weight for episode_info in all_episodes_info for weight in episode_info.q_value),
+        dtype=np.float64
+    ))
+    q_values = np.full((len(weights), len(all_episodes_info)), np.nan)
+    for episode_idx, episode_info in enumerate(all_episodes_info):
+        # Fark olarak saklanan tablolar önceki bölümün sütunu üzerine uygulanarak yeniden kurulur
+        if episode_info.q_value_is_delta and episode_idx > 0:
+            q_values[:, episode_idx] = q_values[:, episode_idx - 1]
+        q_value = episode_info.q_value
+        keys = np.fromiter(q_value.keys(), dtype=np.float64, count=len(q_value))
+        values = np.fromiter(q_value.values(), dtype=np.float64, count=len(q_value))
+        q_values[np.searchsorted(weights, keys), episode_idx] = values
+
+    # Başlık alanları bölüm başına tek demet olarak okunur ve sütunlara çevrilir
+    header_columns = list(zip(*map(EPISODE_HEADER_FIELDS, all_episodes_info))) or [()] * 7
+    (episode_nums, switch_points, model_selected_switching_points, explored_switching_points,
+     termination_types, total_times, final_weights) = header_columns
+
+    return EpisodeColumns(
+        episode_nums=np.array(episode_nums, dtype=np.int64),
+        switch_points=_to_float_array(switch_points),
+        model_selected_switching_points=_to_float_array(model_selected_switching_points),
+        explored_switching_points=_to_float_array(explored_switching_points),
+        termination_types=np.array(termination_types, dtype=object),
+        total_times=_to_float_array(total_times),
+        final_weights=_to_float_array(final_weights),
+        weights=weights,
+        q_values=q_values
+    )
+
+
+def _prepare_q_columns(weights, q_values, switch_points):
+    """Q-değerlerini 4 basamağa yuvarlar ve deneyimlenen ağırlık maskesini üretir."""
+    return np.round(q_values, 4), weights[:, None] == switch_points[None, :]
+
+
+def _check_quant(quant):
+    """Desteklenmeyen Q-tablosu nicemleme kipinde hata verir."""
+    if quant not in ('fp32', 'int8'):
+        raise ValueError(f"Unsupported Q-table quantization '{quant}', expected 'fp32' or 'int8'")
+
+
+def quantize_q_values(q_values, axis=None):
+    """
+    Q-değerlerini 8 bitlik afin nicemlemeyle kodlar: q ≈ kod * scale + zero_point.
+
+    Args:
+        q_values: Q-değerleri dizisi (NaN değerler yok sayılır ve 0 olarak kodlanır)
+        axis: Ölçeğin ayrı hesaplandığı eksen; None ise tüm dizi için tek ölçek
+
+    Returns:
+        (codes, scale, zero_point): uint8 kodlar ve eksen boyunca ölçek/sıfır noktası
+    """
+    q = np.asarray(q_values, dtype=np.float64)
+    missing = np.isnan(q)
+    zero_point = np.min(np.where(missing, np.inf, q), axis=axis, initial=np.inf)
+    span = np.max(np.where(missing, -np.inf, q), axis=axis, initial=-np.inf) - zero_point
+    # Sabit veya boş tablolarda ölçek 1 alınır; kodların hepsi 0 olur
+    scale = np.where(np.isfinite(span) & (span > 0), span / 255, 1.0)
+    zero_point = np.where(np.isfinite(zero_point), zero_point, 0.0)
+    if axis is not None:
+        scale_b, zero_point_b = np.expand_dims(scale, axis), np.expand_dims(zero_point, axis)
+    else:
+        scale_b, zero_point_b = scale, zero_point
+    codes = np.round((np.where(missing, zero_point_b, q) - zero_point_b) / scale_b).astype(np.uint8)
+    return codes, scale, zero_point
+
+
+def dequantize_q_values(codes, scale, zero_point):
+    """quantize_q_values ile kodlanmış değerleri float32 Q-değerlerine geri çevirir."""
+    return (np.asarray(codes, dtype=np.float32) * np.float32(scale) + np.float32(zero_point)).astype(np.float32)
+
+
+def _nan_to_none(value):
+    """Excel'e yazılacak NaN değerlerini boş hücreye çevirir."""
+    return None if value != value else value
+
+
+def _block_row_styles(row_pos, left_fill=None, right_fill=None, centered=False):
+    """
+    Bölüm bloğundaki bir satırın (sol, sağ) hücre stillerini döndürür.
+
+    Her stil (border_key, bold, centered, fill) demetidir; border_key BORDERS, fill ise
+    FILLS tablosunun anahtarıdır.
+    """
+    return (
+        ((row_pos, 'left'), True, centered, left_fill),
+        ((row_pos, 'right'), True, centered, right_fill)
+    )
+
+
+# Birleştirilmiş bölüm başlığı; ikinci hücre yalnızca kenarlık taşır
+TITLE_ROW_STYLES = (
+    (('top', 'left'), True, True, 'light_gray'),
+    (('top', 'right'), False, False, None)
+)
+
+
+def build_episode_rows(block):
+    """
+    Tek bir bölümün iki sütunluk bloğunu düz değer ve stil tanımlayıcısı satırları olarak üretir.
+
+    Args:
+        block: (episode_num, header_values, weights, q_values, highlights) demeti;
+            q_values ve highlights ağırlık ekseniyle hizalı listelerdir
+
+    Returns:
+        (values_rows, style_rows): her satır için (sol, sağ) değer ve stil çiftleri
+    """
+    episode_num, header_values, weights, q_values, highlights = block
+    values_rows = []
+    style_rows = []
+
+    # Bölüm başlığı (2 sütuna birleştirilir)
+    values_rows.append((f"Episode {episode_num + 1}", None))
+    style_rows.append(TITLE_ROW_STYLES)
+
+    # Diğer bilgileri 2 sütun kullanarak alt alta yaz
+    info_styles = _block_row_styles('mid')
+    for label, value in zip(HEADER_LABELS, header_values):
+        if label == "Explored" and value != value:
+            value = 'None'
+        values_rows.append((f"{label}:", _nan_to_none(value)))
+        # "Result" satırını renklendir
+        if label == "Result":
+            termination_fill = TERMINATION_FILLS.get(value, 'green')
+            style_rows.append(_block_row_styles('mid', termination_fill, termination_fill))
+        else:
+            style_rows.append(info_styles)
+
+    # Sütun başlıkları (Weight, Q Value); veri satırı yoksa bloğun alt kenarıdır
+    values_rows.append(("Weight", "Q Value"))
+    style_rows.append(_block_row_styles('bot' if not weights else 'mid', 'silver', 'dim_gray', centered=True))
+
+    # --- Q-Değeri Verileri ---
+    row_styles = {
+        (row_pos, highlighted): _block_row_styles(
+            row_pos, *(('highlight', 'highlight') if highlighted else ('light_gray', 'dark_gray'))
+        )
+        for row_pos in ('mid', 'bot')
+        for highlighted in (False, True)
+    }
+    last_idx = len(weights) - 1
+    for data_idx, (weight, q_val, highlighted) in enumerate(zip(weights, q_values, highlights)):
+        values_rows.append((weight, _nan_to_none(q_val)))
+        style_rows.append(row_styles[('bot' if data_idx == last_idx else 'mid', highlighted)])
+
+    return values_rows, style_rows
+
+
+def _qvalue_parquet_schema(quant):
+    """Nicemleme kipine göre Q-değeri Parquet şemasını döndürür."""
+    return QVALUE_PARQUET_SCHEMA_INT8 if quant == 'int8' else QVALUE_PARQUET_SCHEMA
+
+
+def _qvalue_parquet_table(episodes, quant):
+    """
+    EpisodeColumns yapısını Q-değeri Parquet şemasında uzun biçimli bir tabloya çevirir.
+
+    Toplu yazım (write_qvalue_updates_to_parquet) ve akış (QValueParquetWriter) aynı
+    tabloyu bu fonksiyonla üretir.
+    """
+    # (ağırlık x bölüm) tablosu bölüm sıralı uzun biçime açılır; eksik ağırlıklar atlanır
+    num_weights = len(episodes.weights)
+    q_values = episodes.q_values.T.ravel()
+    present = ~np.isnan(q_values)
+    weights = np.tile(episodes.weights, len(episodes))
+    episode_nums = np.repeat(episodes.episode_nums, num_weights)
+    termination_types = np.repeat(episodes.termination_types, num_weights)
+    is_experienced = weights == np.repeat(episodes.switch_points, num_weights)
+
+    columns = {
+        'episode_num': episode_nums[present],
+        'termination_type': pa.array(termination_types[present].tolist(), type=pa.string()),
+        'weight': weights[present],
+        'q_value': q_values[present],
+        'is_experienced': is_experienced[present],
+    }
+    if quant == 'int8':
+        # Her bölüm (sütun) kendi ölçeğiyle kodlanır
+        codes, scales, zero_points = quantize_q_values(episodes.q_values, axis=0)
+        columns['q_value'] = codes.T.ravel()[present]
+        columns['q_scale'] = np.repeat(scales, num_weights)[present]
+        columns['q_zero_point'] = np.repeat(zero_points, num_weights)[present]
+    schema = _qvalue_parquet_schema(quant)
+    return pa.table({name: columns[name] for name in schema.names}, schema=schema)
+
+
+class QValueParquetWriter:
+    """
+    Bölümlerin Q-değerlerini geldikçe Parquet dosyasına yazar.
+
+    write_qvalue_updates_to_parquet ile aynı şemayı kullanır; ancak tüm bölüm geçmişini
+    bellekte tutmak yerine her PARQUET_ROW_GROUP_EPISODES bölümü bir satır grubu olarak
+    diske akıtır. Fark olarak saklanan Q-tabloları (q_value_is_delta) güncel tablo
+    üzerine uygulanır.
+    """
+
+    def __init__(self, file_path, row_group_episodes=PARQUET_ROW_GROUP_EPISODES, quant=Q_TABLE_QUANT):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow package required for Parquet output. Install with: pip install pyarrow")
+        _check_quant(quant)
+        self.file_path = file_path
+        self.row_group_episodes = row_group_episodes
+        self.quant = quant
+        self.schema = _qvalue_parquet_schema(quant)
+        self._writer = None
+        self._q_table = {}
+        self._buffered_episodes = []
+
+    def write_episode(self, episode_info):
+        """Bir bölümün (EpisodeInfo veya sözlük) Q-değerlerini tampona ekler; tampon dolunca yazar."""
+        episode_info = _as_episode_info(episode_info)
+        # (durum, eylem) anahtarlı tablolar weight sütununa sığmaz; satır grubu yazılırken
+        # değil, bölüm tampona girmeden hata verilir
+        if any(isinstance(weight, tuple) for weight in episode_info.q_value):
+            raise TypeError("Parquet output only supports weight-keyed Q-tables, not (state, action) keys")
+        if episode_info.q_value_is_delta:
+            self._q_table.update(episode_info.q_value)
+        else:
+            self._q_table = dict(episode_info.q_value)
+
+        # Satır grubu tek başına okunabilsin diye tampona tam tablonun kopyası girer
+        self._buffered_episodes.append(
+            replace(episode_info, q_value=dict(self._q_table), q_value_is_delta=False))
+        if len(self._buffered_episodes) >= self.row_group_episodes:
+            self.flush()
+
+    def flush(self):
+        """Tampondaki bölümleri tek satır grubu olarak yazar."""
+        if not self._buffered_episodes:
+            return
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.file_path, self.schema,
+                                            compression='snappy', use_dictionary=True)
+        table = _qvalue_parquet_table(_episodes_to_soa(self._buffered_episodes), self.quant)
+        self._writer.write_table(table)
+        self._buffered_episodes.clear()
+
+    def close(self):
+        """Kalan bölümleri yazar ve dosyayı kapatır."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
 
 class FileHandler:
     
-    def write_to_text(self, q_table, output_path):
+    def write_to_text(self, q_table, output_path, quant=Q_TABLE_QUANT):
 
+        _check_quant(quant)
         try:
-            with open(output_path, 'w', encoding='utf-8') as file:
-                for i, v in q_table.items():
-                    file.write(f"{i}: {v}\n")
+            # Satırlar parçalar halinde birleştirilip tek write çağrısıyla yazılır;
+            # çok büyük tablolarda dev bir ara string oluşmaz
+            items = iter(q_table.items())
+            header = ""
+            if quant == 'int8':
+                # Değerler 8 bitlik kodlar olarak yazılır; geri çevirmek için ölçek başlıkta
+                codes, scale, zero_point = quantize_q_values(
+                    np.fromiter(q_table.values(), dtype=np.float64, count=len(q_table)))
+                items = zip(q_table.keys(), codes.tolist())
+                header = f"# quant=int8 scale={float(scale)!r} zero_point={float(zero_point)!r}\n"
+            with open(output_path, 'w', encoding='utf-8', buffering=TEXT_WRITE_BUFFER_SIZE) as file:
+                file.write(header)
+                while True:
+                    chunk = list(islice(items, TEXT_WRITE_CHUNK_SIZE))
+                    if not chunk:
+                        break
+                    file.write("".join([f"{i}: {v}\n" for i, v in chunk]))
 
             print(f"Veriler '{output_path}' dosyasına başarıyla yazıldı.")
 
@@ -22,141 +467,216 @@ class FileHandler:
 
 
 
-    def write_qvalue_updates_to_excel(self, all_episodes_info, file_path):
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "qvalue_updates_2col"
+    def write_qvalue_updates_to_excel(self, all_episodes_info, file_path, engine="xlsxwriter"):
+        """
+        Bölümlerin Q-değeri tablolarını yan yana bloklar halinde Excel dosyasına yazar.
+
+        Args:
+            all_episodes_info: EpisodeInfo (veya sözlük) listesi ya da EpisodeColumns
+            file_path: Kaydedilecek .xlsx dosyasının yolu
+            engine: "xlsxwriter" (varsayılan, sabit bellekli akış), "xmlfile" (lxml ile doğrudan
+                XML akışı, en hızlı) veya "openpyxl"
+        """
+        if engine == "xlsxwriter" and not XLSXWRITER_AVAILABLE:
+            logging.warning("xlsxwriter not available, falling back to openpyxl. Install with: pip install xlsxwriter")
+            engine = "openpyxl"
+        elif engine == "xmlfile" and not LXML_AVAILABLE:
+            logging.warning("lxml not available, falling back to openpyxl. Install with: pip install lxml")
+            engine = "openpyxl"
+
+        # Bölüm listesi sütun tabanlı yapıya bir kez çevrilir
+        if isinstance(all_episodes_info, EpisodeColumns):
+            episodes = all_episodes_info
+        else:
+            episodes = _episodes_to_soa(all_episodes_info)
 
-        # --- Stiller (Değişiklik yok) ---
-        font_bold = Font(bold=True, size=12)
-        center_alignment = Alignment(horizontal="center", vertical="center")
-        thin_border = Border(
-            left=Side(style='thin', color='000000'),
-            right=Side(style='thin', color='000000'),
-            top=Side(style='thin', color='000000'),
-            bottom=Side(style='thin', color='000000')
-        )
-        thick_side = Side(style='thick', color='000000')
-        light_gray_fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
-        dark_gray_fill = PatternFill(start_color="999999", end_color="999999", fill_type="solid")
-        silver_fill = PatternFill(start_color="C0C0C0", end_color="C0C0C0", fill_type="solid")
-        dim_gray_fill = PatternFill(start_color="696969", end_color="696969", fill_type="solid")
-        highlight_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-        green_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-        yellow_fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-        red_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-
-        start_col = 1
         num_columns = 2  # Her bölüm için sütun sayısı 2'ye indirildi
+        data_header_row = len(HEADER_LABELS) + 2
+        max_row = data_header_row + len(episodes.weights)
 
-        for episode_info in all_episodes_info:
-            episode_col = start_col
-
-            # --- Başlıklar (YENİ DÜZEN) ---
-            # Bölüm başlığını 2 sütuna birleştir
-            ws.merge_cells(start_row=1, start_column=episode_col, end_row=1, end_column=episode_col + num_columns - 1)
-            title_cell = ws.cell(row=1, column=episode_col)
-            title_cell.value = f"Episode {episode_info['episode_num'] + 1}"
-            title_cell.font = font_bold
-            title_cell.alignment = center_alignment
-            title_cell.fill = light_gray_fill
-
-            # Diğer bilgileri 2 sütun kullanarak alt alta yaz
-            header_info = {
-                "Experienced": episode_info['switch_point'],
-                "Model-Selected": episode_info['model_selected_switching_point'],
-                "Explored": episode_info['explored_switching_point'] if episode_info['explored_switching_point'] is not None else 'None',
-                "Result": episode_info.get('termination_type', 'Normal'),
-                "Total Time": episode_info['total_time'],
-                "Total Weight": episode_info['final_weight']
-            }
-            
-            current_row = 2
-            for label, value in header_info.items():
-                # Etiket hücresi
-                label_cell = ws.cell(row=current_row, column=episode_col)
-                label_cell.value = f"{label}:"
-                label_cell.font = font_bold
-                
-                # Değer hücresi
-                value_cell = ws.cell(row=current_row, column=episode_col + 1)
-                value_cell.value = value
-                value_cell.font = font_bold
-                
-                # "Result" satırını renklendir
-                if label == "Result":
-                    termination_fill = {
-                        "Normal": green_fill, "Underflow": yellow_fill, "Overflow": red_fill
-                    }.get(value, green_fill)
-                    label_cell.fill = termination_fill
-                    value_cell.fill = termination_fill
-
-                current_row += 1
-
-            # Sütun başlıkları (Weight, Q Value)
-            data_header_row = current_row
-            columns = ["Weight", "Q Value"]
-            fills = [silver_fill, dim_gray_fill]
-            for idx, (col_name, fill) in enumerate(zip(columns, fills)):
-                cell = ws.cell(row=data_header_row, column=episode_col + idx)
-                cell.value = col_name
-                cell.font = font_bold
-                cell.fill = fill
-                cell.alignment = center_alignment
-
-            # --- Q-Değeri Verilerini Yazma (Güncellenmiş) ---
-            row_idx = data_header_row + 1
-            experienced_weight = episode_info['switch_point']
-            
-            # Sıralamayı anahtara (key) göre yap (önceki cevaptaki gibi)
-            # episode_info['q_value'] şeklinde düzeltildiğini varsayıyorum
-            sorted_items = sorted(episode_info['q_value'].items(), key=lambda item: item[0])
-            
-            for weight, q_val in sorted_items:
-                # action ve count artık yazılmıyor
-                ws.cell(row=row_idx, column=episode_col, value=weight).font = font_bold
-                
-                q_value_cell = ws.cell(row=row_idx, column=episode_col + 1)
-                q_value_cell.value = float(f"{q_val:.4f}")
-                q_value_cell.font = font_bold
-
-                if weight == experienced_weight:
-               
-                    for offset in range(num_columns):
-                        ws.cell(row=row_idx, column=episode_col + offset).fill = highlight_fill
-                else:
-                 
-                    ws.cell(row=row_idx, column=episode_col).fill = light_gray_fill
-                    ws.cell(row=row_idx, column=episode_col + 1).fill = dark_gray_fill
-                
-                row_idx += 1
-
-            # --- Formatlama (Güncellenmiş) ---
-            # Sütun genişlikleri
-            for idx in range(num_columns):
-                col_letter = get_column_letter(episode_col + idx)
-                ws.column_dimensions[col_letter].width = 20
-
-            # Kenarlıklar
-            top_row = 1
-            bottom_row = row_idx - 1
-            for row in range(top_row, bottom_row + 1):
-                for col_num in range(num_columns):
-                    col = episode_col + col_num
-                    cell = ws.cell(row=row, column=col)
-                    cell.border = thin_border
-                    if row == top_row:
-                        cell.border = Border(top=thick_side, left=cell.border.left, right=cell.border.right, bottom=cell.border.bottom)
-                    if row == bottom_row:
-                        cell.border = Border(bottom=thick_side, left=cell.border.left, right=cell.border.right, top=cell.border.top)
-                    if col_num == 0:
-                        cell.border = Border(left=thick_side, top=cell.border.top, bottom=cell.border.bottom, right=cell.border.right)
-                    if col_num == num_columns - 1:
-                        cell.border = Border(right=thick_side, top=cell.border.top, bottom=cell.border.bottom, left=cell.border.left)
-
-            # Sonraki blok için başlangıç sütununu ayarla
-            start_col += num_columns
+        results = [build_episode_rows(block) for block in self._episode_blocks(episodes)]
+
+        # Bloklar ortak ağırlık eksenini paylaştığından aynı uzunluktadır; sütun sütun birleştirilir
+        if results:
+            value_blocks, style_blocks = zip(*results)
+            rows_buffer = [list(chain.from_iterable(row)) for row in zip(*value_blocks)]
+            styles_buffer = [list(chain.from_iterable(row)) for row in zip(*style_blocks)]
+        else:
+            rows_buffer = [[] for _ in range(max_row)]
+            styles_buffer = [[] for _ in range(max_row)]
+
+        # Bölüm başlıklarının birleştirme aralıkları (start_row, start_col, end_row, end_col)
+        # döngü dışında tek seferde toplanır ve motorlara toplu olarak uygulanır
+        merges = [
+            (1, start_col, 1, start_col + num_columns - 1)
+            for start_col in range(1, num_columns * len(episodes) + 1, num_columns)
+        ]
+
+        if engine == "xlsxwriter":
+            self._save_with_xlsxwriter(file_path, rows_buffer, styles_buffer, merges, data_header_row)
+        elif engine == "xmlfile":
+            self._save_with_xmlfile(file_path, rows_buffer, styles_buffer, merges, data_header_row)
+        else:
+            self._save_with_openpyxl(file_path, rows_buffer, styles_buffer, merges, data_header_row)
+
+    def write_qvalue_updates_to_parquet(self, all_episodes_info, file_path, quant=Q_TABLE_QUANT):
+        """
+        Bölümlerin Q-değerlerini analiz araçları için stilsiz, sütun tabanlı Parquet dosyasına yazar.
+
+        Her satır bir (bölüm, ağırlık) çiftidir: episode_num, termination_type, weight,
+        q_value, is_experienced. Okurken pd.read_parquet(path, columns=[...]) ile yalnızca
+        gereken sütunlar yüklenebilir.
+
+        Args:
+            all_episodes_info: EpisodeInfo (veya sözlük) listesi ya da EpisodeColumns
+            file_path: Kaydedilecek .parquet dosyasının yolu
+            quant: 'fp32' (değerler olduğu gibi) veya 'int8' (bölüm başına ölçekli 8 bitlik kodlar)
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow package required for Parquet output. Install with: pip install pyarrow")
+        _check_quant(quant)
+
+        if isinstance(all_episodes_info, EpisodeColumns):
+            episodes = all_episodes_info
+        else:
+            episodes = _episodes_to_soa(all_episodes_info)
+
+        table = _qvalue_parquet_table(episodes, quant)
+        # Tekrarlayan episode_num ve termination_type sütunları sözlük kodlamasıyla sıkışır
+        pq.write_table(table, file_path, compression='snappy', use_dictionary=True)
+
+    def _save_with_openpyxl(self, file_path, rows_buffer, styles_buffer, merges, data_header_row):
+        # write_only modu hücreleri satır satır diske akıtır; tüm çalışma kitabı bellekte tutulmaz
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("qvalue_updates_2col")
+
+        # Sütun harfleri bir kez hesaplanır; genişlikler ve birleştirilmiş başlıklar
+        # satırlar yazılmadan önce tanımlanmalı
+        total_columns = len(rows_buffer[0])
+        col_letters = [get_column_letter(i) for i in range(1, total_columns + 1)]
+        for col_letter in col_letters:
+            ws.column_dimensions[col_letter].width = 20
+        for start_row, start_col, end_row, end_col in merges:
+            ws.merged_cells.add(f"{col_letters[start_col - 1]}{start_row}:{col_letters[end_col - 1]}{end_row}")
 
         # Yeni başlık düzenine göre dondurulmuş bölmeyi ayarla
         ws.freeze_panes = f"A{data_header_row + 1}"
-        wb.save(file_path)
\ No newline at end of file
+
+        # Her farklı stil tanımlayıcısı için çalışma kitabına bir kez NamedStyle eklenir;
+        # hücrelere yazı tipi, dolgu, kenarlık ve hizalama ayrı ayrı atanmak yerine
+        # yalnızca stil adı atanır
+        style_names = {}
+
+        def get_style_name(style):
+            name = style_names.get(style)
+            if name is None:
+                border_key, bold, centered, fill = style
+                name = style_names[style] = f"qvalue_style_{len(style_names)}"
+                wb.add_named_style(NamedStyle(
+                    name,
+                    font=BOLD_FONT if bold else DEFAULT_FONT,
+                    fill=FILLS[fill] if fill is not None else PatternFill(),
+                    border=BORDERS[border_key],
+                    alignment=CENTER_ALIGNMENT if centered else Alignment()
+                ))
+            return name
+
+        for values, styles in zip(rows_buffer, styles_buffer):
+            row_cells = []
+            for value, style in zip(values, styles):
+                if style is None:
+                    row_cells.append(None)
+                    continue
+
+                cell = WriteOnlyCell(ws, value=value)
+                cell.style = get_style_name(style)
+                row_cells.append(cell)
+            ws.append(row_cells)
+
+        # wb.save() varsayılan sıkıştırma seviyesini kullanır; arşiv burada açılıp yazıcıya verilir
+        with ZipFile(file_path, 'w', ZIP_DEFLATED, allowZip64=True, compresslevel=XLSX_COMPRESSLEVEL) as archive:
+            ExcelWriter(wb, archive).save()
+
+    def _save_with_xlsxwriter(self, file_path, rows_buffer, styles_buffer, merges, data_header_row):
+        # constant_memory satırların sırayla yazılmasını gerektirir; tamponlar zaten satır sıralı
+        wb = xlsxwriter.Workbook(file_path, {'constant_memory': True, 'use_zip64': True})
+        ws = wb.add_worksheet("qvalue_updates_2col")
+        formats = {}  # Aynı stildeki tüm hücreler tek bir Format nesnesini paylaşır
+
+        def get_format(border_key, bold, centered, fill):
+            key = (border_key, bold, centered, fill)
+            if key not in formats:
+                row_pos, col_pos = border_key
+                properties = {
+                    'top': 5 if row_pos == 'top' else 1,
+                    'bottom': 5 if row_pos == 'bot' else 1,
+                    'left': 5 if col_pos == 'left' else 1,
+                    'right': 5 if col_pos == 'right' else 1,
+                }
+                if bold:
+                    properties.update({'bold': True, 'font_size': 12})
+                if centered:
+                    properties.update({'align': 'center', 'valign': 'vcenter'})
+                if fill is not None:
+                    properties.update({'pattern': 1, 'bg_color': f"#{FILL_COLORS[fill]}"})
+                formats[key] = wb.add_format(properties)
+            return formats[key]
+
+        ws.set_column(0, max(len(rows_buffer[0]) - 1, 0), 20)
+
+        # constant_memory modunda birleştirme, aralığın sol üst hücresi yazılırken yapılmalı
+        merge_origins = {(r1, c1): (r2, c2) for r1, c1, r2, c2 in merges}
+        merged_tails = {
+            (r, c)
+            for r1, c1, r2, c2 in merges
+            for r in range(r1, r2 + 1)
+            for c in range(c1, c2 + 1)
+        }.difference(merge_origins)
+
+        for row, (values, styles) in enumerate(zip(rows_buffer, styles_buffer), start=1):
+            for col, (value, style) in enumerate(zip(values, styles), start=1):
+                if style is None or (row, col) in merged_tails:
+                    continue
+                col_idx = col - 1
+                if (row, col) in merge_origins:
+                    end_row, end_col = merge_origins[(row, col)]
+                    ws.merge_range(row - 1, col_idx, end_row - 1, end_col - 1, value, get_format(*style))
+                elif value is None:
+                    ws.write_blank(row - 1, col_idx, None, get_format(*style))
+                else:
+                    ws.write(row - 1, col_idx, value, get_format(*style))
+
+        # Yeni başlık düzenine göre dondurulmuş bölmeyi ayarla
+        ws.freeze_panes(data_header_row, 0)
+        wb.close()
+
+    def _save_with_xmlfile(self, file_path, rows_buffer, styles_buffer, merges, data_header_row):
+        # Düzenli tablo yapısı openpyxl hücre nesneleri olmadan doğrudan XML olarak akıtılır
+        merged_ranges = [
+            f"{column_letter(start_col)}{start_row}:{column_letter(end_col)}{end_row}"
+            for start_row, start_col, end_row, end_col in merges
+        ]
+        write_xlsx(file_path, "qvalue_updates_2col", rows_buffer, styles_buffer, FILL_COLORS,
+                   column_width=20, merged_ranges=merged_ranges, freeze_row=data_header_row,
+                   compresslevel=XLSX_COMPRESSLEVEL)
+
+    def _episode_blocks(self, episodes):
+        """EpisodeColumns yapısını build_episode_rows için bölüm başına girdilere böler."""
+        # Yuvarlama ve deneyimlenen ağırlık karşılaştırması tüm tablo için tek seferde yapılır
+        rounded, highlights = _prepare_q_columns(episodes.weights, episodes.q_values, episodes.switch_points)
+        weights = episodes.weights.tolist()
+        q_columns = rounded.T.tolist()
+        highlight_columns = highlights.T.tolist()
+        header_rows = zip(
+            episodes.switch_points.tolist(),
+            episodes.model_selected_switching_points.tolist(),
+            episodes.explored_switching_points.tolist(),
+            episodes.termination_types.tolist(),
+            episodes.total_times.tolist(),
+            episodes.final_weights.tolist()
+        )
+        return [
+            (episode_num, header_values, weights, q_column, highlight_column)
+            for episode_num, header_values, q_column, highlight_column
+            in zip(episodes.episode_nums.tolist(), header_rows, q_columns, highlight_columns)
+        ]
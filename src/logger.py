@@ -290,5 +290,6 @@ class TrainingLogger:
             'switching_point_trajectory_path': os.path.join(self.output_dir, "switching_point_trajectory.png"),
             'log_file_path': self.log_file_path,
             'q_values_path': os.path.join(self.output_dir, "q_values.txt"),
-            'excel_path': os.path.join(self.output_dir, "q_value.xlsx")
+            'excel_path': os.path.join(self.output_dir, "q_value.xlsx"),
+            'parquet_path': os.path.join(self.output_dir, "q_value.parquet")
         } 
\ No newline at end of file
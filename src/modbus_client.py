@@ -3,9 +3,14 @@ Modbus client for sending switching points to physical device.
 """
 
 import logging
-from typing import Optional
+from typing import Dict, Optional
 from config import DEFAULT_MODBUS_REGISTER
 
+# Modbus spec limit for registers in one Write Multiple Registers (FC16) request
+MAX_REGISTERS_PER_WRITE = 123
+# Holding register numbers (4xxxx) are offset from zero-based protocol addresses by this
+HOLDING_REGISTER_OFFSET = 40001
+
 try:
     from pymodbus.client import ModbusTcpClient
     PYMODBUS_AVAILABLE = True
@@ -30,6 +35,7 @@ class ModbusClient:
         self.port = port
         self.register = register
         self.client = None
+        self._pending_writes: Dict[int, int] = {}  # holding register number -> raw value
         
         if not PYMODBUS_AVAILABLE:
             raise ImportError("pymodbus package required for Modbus communication")
@@ -54,10 +60,65 @@ class ModbusClient:
             logging.error(f"Error connecting to Modbus device: {e}")
             return False
     
+    def queue_register_write(self, register: int, value: int) -> None:
+        """
+        Queue a raw value for a holding register; nothing is sent until flush().
+        
+        Args:
+            register: Holding register number (4xxxx)
+            value: Raw 16-bit register value
+        """
+        self._pending_writes[register] = value
+    
+    def flush(self) -> bool:
+        """
+        Send all queued register writes, one request per run of contiguous registers.
+        
+        Runs longer than MAX_REGISTERS_PER_WRITE are split; single registers use
+        Write Single Register, longer runs Write Multiple Registers (FC16).
+        
+        Returns:
+            True if every write succeeded, False otherwise
+        """
+        if not self._pending_writes:
+            return True
+        if not self.client:
+            logging.error("Modbus client not connected")
+            return False
+        
+        pending = sorted(self._pending_writes.items())
+        self._pending_writes.clear()
+        
+        # Group contiguous register numbers into runs
+        runs = []
+        for register, value in pending:
+            if runs and register == runs[-1][0] + len(runs[-1][1]) and len(runs[-1][1]) < MAX_REGISTERS_PER_WRITE:
+                runs[-1][1].append(value)
+            else:
+                runs.append((register, [value]))
+        
+        success = True
+        for start_register, values in runs:
+            address = start_register - HOLDING_REGISTER_OFFSET
+            try:
+                if len(values) == 1:
+                    result = self.client.write_register(address, values[0])
+                else:
+                    result = self.client.write_registers(address, values)
+                if result.isError():
+                    logging.error(f"Error writing {len(values)} register(s) starting at {start_register}")
+                    success = False
+            except Exception as e:
+                logging.error(f"Error writing registers starting at {start_register}: {e}")
+                success = False
+        return success
+    
     def send_switching_point(self, switching_point: float) -> bool:
         """
         Send switching point to device via Modbus.
         
+        Queues the scaled value and flushes it together with any other pending writes.
+        
         Args:
             switching_point: Switching point weight value
             
@@ -68,28 +129,17 @@ class ModbusClient:
             logging.error("Modbus client not connected")
             return False
             
-        try:
-            # Scale the switching point for device (multiply by 1000)
-            scaled_weight = int(switching_point * 10)
-            
-            # Adjust register address (Modbus addressing convention)
-            zero_based_register = self.register - 40001
-            
-            # Write to the register
-            result = self.client.write_register(zero_based_register, scaled_weight)
-            
-            if result.isError():
-                logging.error(f"Error writing switching point {switching_point} "
-                            f"(scaled {scaled_weight}) to register {self.register}")
-                return False
-            else:
-                logging.info(f"Switching point {switching_point} "
-                           f"(scaled {scaled_weight}) sent to register {self.register}")
-                return True
-                
-        except Exception as e:
-            logging.error(f"Error sending switching point: {e}")
-            return False
+        # Scale the switching point for device (multiply by 1000)
+        scaled_weight = int(switching_point * 10)
+        self.queue_register_write(self.register, scaled_weight)
+        
+        if self.flush():
+            logging.info(f"Switching point {switching_point} "
+                       f"(scaled {scaled_weight}) sent to register {self.register}")
+            return True
+        logging.error(f"Error writing switching point {switching_point} "
+                    f"(scaled {scaled_weight}) to register {self.register}")
+        return False
     
     def close(self) -> None:
         """Close Modbus connection."""
@@ -4,10 +4,93 @@ Handles parsing and preprocessing of real filling episode data.
 """
 
 import logging
-from typing import List, Optional, Tuple, Dict, Any
+import re
+import numpy as np
+from typing import List, Optional, Tuple, Dict, Any, Union
 from data_processor import FillingSession
 from config import DEFAULT_WEIGHT_QUANTIZATION_STEP
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _tokenize_pairs(buf):
+        """
+        Split space-free "a,b;a,b;..." ASCII bytes into two int64 arrays in one pass.
+        
+        Returns (firsts, seconds, ok); ok is False for anything other than well-formed
+        integer pairs.
+        """
+        max_pairs = buf.size // 3 + 1  # shortest pair is "a,b;"
+        firsts = np.empty(max_pairs, dtype=np.int64)
+        seconds = np.empty(max_pairs, dtype=np.int64)
+        count = 0
+        field = 0
+        value = 0
+        sign = 1
+        digits = 0
+        for i in range(buf.size):
+            c = buf[i]
+            if 48 <= c <= 57:  # '0'-'9'
+                value = value * 10 + (c - 48)
+                digits += 1
+            elif c == 45:  # '-'
+                if digits != 0 or sign != 1:
+                    return firsts[:0], seconds[:0], False
+                sign = -1
+            elif c == 44:  # ','
+                if field != 0 or digits == 0:
+                    return firsts[:0], seconds[:0], False
+                firsts[count] = sign * value
+                field = 1
+                value = 0
+                sign = 1
+                digits = 0
+            elif c == 59:  # ';'
+                if field == 0 and digits == 0 and sign == 1:
+                    continue  # empty pair
+                if field != 1 or digits == 0:
+                    return firsts[:0], seconds[:0], False
+                seconds[count] = sign * value
+                count += 1
+                field = 0
+                value = 0
+                sign = 1
+                digits = 0
+            else:
+                return firsts[:0], seconds[:0], False
+        # Trailing pair without a closing ';'
+        if field == 1 and digits != 0:
+            seconds[count] = sign * value
+            count += 1
+        elif field != 0 or digits != 0 or sign != 1:
+            return firsts[:0], seconds[:0], False
+        return firsts[:count], seconds[:count], True
+
+
+# Pure-Python counterpart of _tokenize_pairs, accepting exactly the same "a,b" integer pairs
+_PAIR_PATTERN = re.compile(rb'(-?[0-9]+),(-?[0-9]+)')
+
+
+def _tokenize_pairs_python(buf: bytes) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Split space-free "a,b;a,b;..." ASCII bytes into two int64 arrays, or None if malformed."""
+    firsts = []
+    seconds = []
+    for pair in buf.split(b';'):
+        if not pair:
+            continue  # empty pair
+        match = _PAIR_PATTERN.fullmatch(pair)
+        if match is None:
+            return None
+        firsts.append(int(match.group(1)))
+        seconds.append(int(match.group(2)))
+    return np.array(firsts, dtype=np.int64), np.array(seconds, dtype=np.int64)
+
 
 class RealDataProcessor:
     """Processes real-world filling data from physical device."""
@@ -25,12 +108,12 @@ class RealDataProcessor:
         self.tolerance_limits = tolerance_limits
         self.quantization_step = quantization_step
         
-    def parse_raw_data(self, raw_data: str) -> Optional[Dict[str, Any]]:
+    def parse_raw_data(self, raw_data: Union[str, bytes]) -> Optional[Dict[str, Any]]:
         """
         Parse raw data from device into structured format.
         
         Args:
-            raw_data: Raw data string from TCP connection
+            raw_data: Raw data from the device connection, as ASCII bytes or string
             
         Returns:
             Parsed data dictionary or None if invalid
@@ -39,153 +122,102 @@ class RealDataProcessor:
             return None
             
         try:
-            # Clean and process raw data
-            cleaned_data = raw_data.replace(' ', '')
-            cleaned_data = cleaned_data.replace('30,30', '-1,-1')  # Replace switch indicator
-            
-            data_pairs = cleaned_data.split(';')
-            data_pairs = [pair for pair in data_pairs if pair]
-            
-            if not data_pairs:
+            try:
+                raw_bytes = raw_data.encode('ascii') if isinstance(raw_data, str) else raw_data
+                pairs = self._tokenize_raw_data(raw_bytes)
+            except UnicodeEncodeError:
+                pairs = None
+            if pairs is None:
+                logging.error("Malformed raw data, expected ';'-separated integer pairs")
                 return None
-                
-            # Extract timing information and switching state
-            timing_info = self._extract_timing_info(data_pairs)
-            if not timing_info:
-                return None
-                
-            # Parse weight sequence
-            weight_sequence = self._parse_weight_sequence(data_pairs)
-            if not weight_sequence:
-                return None
-                
-            # Calculate overflow/underflow
-            final_weight = self._get_final_weight(data_pairs)
-            overflow_amount, underflow_amount = self._calculate_overflow_underflow(final_weight)
             
-            return {
-                'weight_sequence': weight_sequence,
-                'final_weight': final_weight,
-                'switching_point': timing_info['switching_state'],
-                'episode_length': len(weight_sequence),
-                'coarse_time': timing_info['coarse_time'],
-                'fine_time': timing_info['fine_time'],
-                'total_time': timing_info['total_time'],
-                'overflow_amount': overflow_amount,
-                'underflow_amount': underflow_amount,
-                'raw_data': raw_data
-            }
+            # Tokenizing succeeded, so the data is plain ASCII
+            if not isinstance(raw_data, str):
+                raw_data = raw_data.decode('ascii')
+            return self._parse_pairs(*pairs, raw_data)
             
         except Exception as e:
             logging.error(f"Error parsing raw data: {e}")
             return None
     
-    def _extract_timing_info(self, data_pairs: List[str]) -> Optional[Dict[str, Any]]:
-        """Extract timing information from data pairs."""
-        try:
-            # Check for required markers
-            if "300,300" not in data_pairs or "-1,-1" not in data_pairs:
-                return None
-                
-            # Extract time from last pair
-            last_pair = data_pairs[-1]
-            fine_time, total_time = map(int, last_pair.split(','))
-            
-            fine_time *= 100  # Convert to milliseconds
-            total_time *= 10  # Convert to milliseconds
-            coarse_time = total_time - fine_time
-            
-            # Find switching state
-            switching_state = None
-            for i in range(len(data_pairs) - 1, -1, -1):
-                if data_pairs[i] == "-1,-1":
-                    if i > 0:
-                        switching_state = int(data_pairs[i - 1].split(',')[0])
-                    break
-                    
-            return {
-                'coarse_time': coarse_time,
-                'fine_time': fine_time,
-                'total_time': total_time,
-                'switching_state': switching_state
-            }
-            
-        except Exception as e:
-            logging.error(f"Error extracting timing info: {e}")
-            return None
+    def _tokenize_raw_data(self, raw_data: bytes) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Tokenize raw data into (firsts, seconds) integer arrays, with the compiled kernel
+        when numba is available. Returns None unless the data is well-formed integer pairs.
+        """
+        # bytes from UDPClient.receive_data are used as-is unless there are spaces to strip
+        cleaned = raw_data.replace(b' ', b'') if b' ' in raw_data else raw_data
+        if not NUMBA_AVAILABLE:
+            return _tokenize_pairs_python(cleaned)
+        firsts, seconds, ok = _tokenize_pairs(np.frombuffer(cleaned, dtype=np.uint8))
+        return (firsts, seconds) if ok else None
     
-    def _parse_weight_sequence(self, data_pairs: List[str]) -> Optional[List[int]]:
-        """Parse weight sequence from data pairs."""
-        try:
-            # Rearrange pairs to handle termination marker
-            self._rearrange_pairs(data_pairs)
-            
-            # Extract weight values
-            weights = []
-            for pair in data_pairs:
-                weight = self._extract_weight_from_pair(pair)
-                if weight is not None:
-                    weights.append(weight)
-            
-            # Quantize weights to model format
-            quantized_weights = self._quantize_weights(weights)
-            
-            # Remove initial elements and final weight as per model format
-            processed_weights = self._remove_elements(quantized_weights)
-            
-            return processed_weights
-            
-        except Exception as e:
-            logging.error(f"Error parsing weight sequence: {e}")
+    def _parse_pairs(self, firsts: np.ndarray, seconds: np.ndarray, raw_data: str) -> Optional[Dict[str, Any]]:
+        """Build the parsed episode dictionary from tokenized (first, second) pairs."""
+        if firsts.size == 0:
             return None
-    
-    def _rearrange_pairs(self, data_pairs: List[str]) -> None:
-        """Rearrange pairs to handle termination marker."""
-        for i in range(len(data_pairs)):
-            if '300,300' in data_pairs[i]:
-                if i + 1 < len(data_pairs):
-                    pair_after_300 = data_pairs.pop(i + 1)
-                    data_pairs.insert(i, pair_after_300)
-                break
-    
-    def _extract_weight_from_pair(self, pair: str) -> Optional[int]:
-        """Extract weight value from data pair."""
-        try:
-            elements = pair.strip().split(',')
-            if len(elements) > 0:
-                return int(elements[0].strip())
-        except (ValueError, IndexError):
-            pass
-        return None
-    
-    def _quantize_weights(self, weights: List[int]) -> List[int]:
-        """Quantize weights to model format."""
-        quantized = []
-        for weight in weights:
-            if weight == -1 or weight == 300:
-                quantized.append(weight)  # Keep special markers
-            else:
-                quantized.append(max(0, round(weight / self.quantization_step)))
-        return quantized
-    
-    def _remove_elements(self, weights: List[int]) -> List[int]:
-        """Remove initial elements and final weight as per model requirements."""
-        if len(weights) > 51:
-            weights = weights[50:]  # Remove first 50 elements
-        if len(weights) > 0:
-            weights.pop()  # Remove final weight
-        return weights
-    
-    def _get_final_weight(self, data_pairs: List[str]) -> Optional[int]:
-        """Extract final weight from data pairs."""
-        try:
-            for i in range(len(data_pairs)):
-                if data_pairs[i] == "300,300":
-                    if i + 1 < len(data_pairs):
-                        return int(data_pairs[i - 1].split(',')[0])
-        except (ValueError, IndexError):
-            pass
-        return None
+        
+        # Replace switch indicator
+        switch_pairs = (firsts == 30) & (seconds == 30)
+        firsts = np.where(switch_pairs, -1, firsts)
+        seconds = np.where(switch_pairs, -1, seconds)
+        
+        # Timing information requires both the termination and switch markers
+        termination_idx = np.flatnonzero((firsts == 300) & (seconds == 300))
+        switch_pair_idx = np.flatnonzero((firsts == -1) & (seconds == -1))
+        if termination_idx.size == 0 or switch_pair_idx.size == 0:
+            return None
+        fine_time = int(firsts[-1]) * 100  # Convert to milliseconds
+        total_time = int(seconds[-1]) * 10  # Convert to milliseconds
+        coarse_time = total_time - fine_time
+        last_switch = switch_pair_idx[-1]
+        switching_state = int(firsts[last_switch - 1]) if last_switch > 0 else None
+        
+        # Move the pair after the first termination marker in front of it
+        weights = firsts.copy()
+        moved_seconds = seconds.copy()
+        first_termination = termination_idx[0]
+        if first_termination + 1 < weights.size:
+            order = [first_termination + 1, first_termination]
+            weights[[first_termination, first_termination + 1]] = weights[order]
+            moved_seconds[[first_termination, first_termination + 1]] = moved_seconds[order]
+        
+        # Final weight precedes the first termination marker that has a pair after it
+        termination_idx = np.flatnonzero((weights == 300) & (moved_seconds == 300))
+        termination_idx = termination_idx[termination_idx + 1 < weights.size]
+        final_weight = int(weights[termination_idx[0] - 1]) if termination_idx.size else None
+        
+        # Quantize weights, keeping the special markers
+        markers = (weights == -1) | (weights == 300)
+        quantized = np.where(markers, weights,
+                             np.maximum(0, np.round(weights / self.quantization_step))).astype(np.int32)
+        
+        # Remove initial elements and final weight as per model format
+        if quantized.size > 51:
+            quantized = quantized[50:]
+        weight_sequence = quantized[:-1]
+        if weight_sequence.size == 0:
+            return None
+        
+        switch_indices = np.flatnonzero(weight_sequence == -1)
+        if switch_indices.size == 0:
+            return None
+        
+        overflow_amount, underflow_amount = self._calculate_overflow_underflow(final_weight)
+        
+        return {
+            'weight_sequence': weight_sequence,
+            'switch_idx': int(switch_indices[0]),
+            'final_weight': final_weight,
+            'switching_point': switching_state,
+            'episode_length': weight_sequence.size,
+            'coarse_time': coarse_time,
+            'fine_time': fine_time,
+            'total_time': total_time,
+            'overflow_amount': overflow_amount,
+            'underflow_amount': underflow_amount,
+            'raw_data': raw_data
+        }
     
     def _calculate_overflow_underflow(self, final_weight: Optional[int]) -> Tuple[int, int]:
         """Calculate overflow and underflow amounts."""
@@ -202,19 +234,28 @@ class RealDataProcessor:
             
         return overflow_amount, underflow_amount
     
-    def create_filling_session(self, parsed_data: Dict[str, Any]) -> Optional[FillingSession]:
+    def create_filling_session(self, parsed_data: Dict[str, Any],
+                               session: Optional[FillingSession] = None) -> Optional[FillingSession]:
         """
         Create a FillingSession object from parsed data.
         
         Args:
             parsed_data: Dictionary containing parsed episode data
+            session: Existing session to overwrite in place with the weight array, instead of
+                allocating a new session and list
             
         Returns:
             FillingSession object compatible with existing agents
         """
         try:
-            # Add termination marker
-            weight_sequence = parsed_data['weight_sequence'].copy()
+            if session is not None:
+                # The reused session takes the int32 array as is. The appended final weight
+                # below is never read: the metadata stops at the termination marker
+                session.reset("session_id", parsed_data['weight_sequence'])
+                return session if session.is_valid() else None
+            
+            # A new session gets a list, like the sessions the agents load from Excel
+            weight_sequence = parsed_data['weight_sequence'].tolist()
             #weight_sequence.append(300)  # Add termination marker
             
             # Add final weight
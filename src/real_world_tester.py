@@ -4,21 +4,53 @@ Handles communication with physical device and data collection.
 """
 
 import logging
+import os
+import sys
+import threading
 import time
+from collections import deque
+from dataclasses import asdict, replace
+import numpy as np
 from typing import Optional, Dict, Any, List
-from tcp_client import TCPClient
 from tcp_client import UDPClient
 from modbus_client import ModbusClient
-from file_handler import FileHandler
+from file_handler import FileHandler, EpisodeInfo, QValueParquetWriter, PYARROW_AVAILABLE
 from real_data_processor import RealDataProcessor
+from data_processor import FillingSession
 from database_handler import DatabaseHandler
 from reward_calculator import RewardCalculator
 from config import (
     DEFAULT_UDP_IP, DEFAULT_UDP_PORT, DEFAULT_MODBUS_IP, DEFAULT_MODBUS_PORT,
-    DEFAULT_MODBUS_REGISTER, DEFAULT_DB_CONFIG, DEFAULT_SAFE_WEIGHT_MIN, 
-    DEFAULT_SAFE_WEIGHT_MAX, DEFAULT_WEIGHT_QUANTIZATION_STEP
+    DEFAULT_MODBUS_REGISTER, DEFAULT_SAFE_WEIGHT_MIN, 
+    DEFAULT_SAFE_WEIGHT_MAX, DEFAULT_WEIGHT_QUANTIZATION_STEP,
+    RECEIVE_MAX_RETRIES, RECEIVE_RETRY_BACKOFF, RECEIVE_RETRY_BACKOFF_MAX,
+    DB_WRITE_QUEUE_SIZE, EXCEL_REPORT_ENABLED, IO_THREAD_NICE, get_cpu_pinning
 )
 
+# Indices into RealWorldTester._stats
+OUTCOME_TOTAL, OUTCOME_SUCCESS, OUTCOME_OVERFLOW, OUTCOME_UNDERFLOW, OUTCOME_SAFE, OUTCOME_FAILED = range(6)
+SESSION_STAT_NAMES = (
+    'total_episodes', 'successful_episodes', 'overflow_episodes',
+    'underflow_episodes', 'safe_episodes', 'failed_episodes'
+)
+
+
+def _pin_current_thread(core: Optional[int], label: str) -> bool:
+    """Pin the calling thread to one CPU core; a no-op when core is None, a warning when unsupported."""
+    if core is None:
+        return False
+    if not hasattr(os, 'sched_setaffinity'):
+        logging.warning("CPU pinning is not supported on this platform, %s thread not pinned to CPU %d",
+                        label, core)
+        return False
+    try:
+        os.sched_setaffinity(0, {core})  # pid 0 is the calling thread on Linux
+        logging.info("%s thread pinned to CPU %d", label, core)
+        return True
+    except OSError as e:
+        logging.warning("Could not pin %s thread to CPU %d: %s", label, core, e)
+        return False
+
 
 class RealWorldTester:
     """Handles real-world testing with physical filling device."""
@@ -61,21 +93,29 @@ class RealWorldTester:
             quantization_step
         )
         
-        # Database handler
-        self.db_handler = DatabaseHandler(db_config or DEFAULT_DB_CONFIG)
+        # Database handler; episodes are written by a background thread so database
+        # round trips do not delay the next device interaction
+        self.db_handler = DatabaseHandler(db_config)
+        self._db_queue = deque(maxlen=DB_WRITE_QUEUE_SIZE)
+        self._db_queue_ready = threading.Condition()
+        self._db_thread = None
+        self._db_stopping = False
+        self._db_dropped_episodes = 0
         
         # Reward calculator
         self.reward_calculator = reward_calculator or RewardCalculator()
         
-        # Statistics
-        self.session_stats = {
-            'total_episodes': 0,
-            'successful_episodes': 0,
-            'failed_episodes': 0,
-            'safe_episodes': 0,
-            'overflow_episodes': 0,
-            'underflow_episodes': 0
-        }
+        # Q-table as of the last recorded episode, used to store per-episode diffs
+        self._prev_q_table = {}
+        
+        # Statistics, one counter per outcome (see session_stats for the named view)
+        self._stats = np.zeros(len(SESSION_STAT_NAMES), dtype=np.int64)
+        
+        # CPU mask of the I/O thread before pinning, restored in disconnect_devices()
+        self._saved_affinity = None
+        
+        # Filling session overwritten in place every episode
+        self._session = FillingSession()
         
     def connect_devices(self) -> bool:
         """
@@ -88,12 +128,16 @@ class RealWorldTester:
         
         udp_connected = self.udp_client.connect()
         modbus_connected = self.modbus_client.connect()
-       # db_connected = self.db_handler.connect()
+        db_connected = self.db_handler.connect()
         
         if udp_connected and modbus_connected:
             logging.info("All communication devices connected successfully")
-            if False:
+            if not db_connected:
                 logging.warning("Database connection failed - episodes will not be saved")
+            # Only started once testing will run; a failed connect returns without disconnect_devices()
+            self._start_db_writer()
+            # Pinned after the writer starts, so the writer thread does not inherit the I/O core
+            self._pin_io_thread()
             return True
         else:
             logging.error("Failed to connect to devices")
@@ -109,39 +153,45 @@ class RealWorldTester:
         Returns:
             Episode data dictionary or None if failed
         """
-        logging.info(f"Starting episode with switching point: {"switching_point"}")
+        logging.info("Starting episode")
         
         # Send switching point to device
         #if not self.modbus_client.send_switching_point(switching_point):
         #    logging.error("Failed to send switching point")
-        #    self.session_stats['failed_episodes'] += 1
+        #    self._stats[OUTCOME_FAILED] += 1
         #    return None
         
-        # Wait for episode to complete and receive data
-        while True: 
-            #raw_data = self.udp_client.receive_data()
-            raw_data = "1,    1;-   598,80955;-   611,    1;-   640,    2;-   667,    2;-   667,    0;-   644,    2;-   629,    1;-   598,    3;-   578,    2;-   581,    0;-   581,    0;-   581,    0;-   581,    0;-   581,    0;-   581,    0;-   581,    0;-   594,    1;-   594,    0;-   607,    1;-   612,    0;-   619,    0;-   645,    2;-   671,    2;-   676,    0;-   673,    0;-   673,    0;-   679,    0;-   701,    2;-   717,    1;-   726,    0;-   862,   13;-   929,    6;-  1009,    8;-  1024,    1;-  1060,    3;-  1085,    2;-  1204,   11;-  1204,    0;-  1204,    0;-  1204,    0;-  1204,    0;-  1204,    0;-  1172,    3;-  1058,   11;-   554,   50;   259,   81;  1670,  141;  3262,  159;  5176,  191;  7209,  203;  9579,  237; 12350,  277; 15614,  326; 19307,  369; 23252,  394; 27419,  416; 31600,  418; 35996,  439; 40501,  450; 45333,  483; 50211,  487; 55019,  480; 59487,  446; 63623,  413; 67573,  395; 71467,  389; 75494,  402; 79404,  391; 83198,  379; 86602,  340; 89816,  321; 92988,  317; 96442,  345;100245,  380;104166,  392;107921,  375;111252,  333;114418,  316;117665,  324;121343,  367;125348,  400;129424,  407;133151,  372;136508,  335;139727,  321;143143,  341;147048,  390;151116,  406;155045,  392;158450,  340;161470,  302;164519,  304;168019,  350;172052,  403;176263,  421;180271,  400;183713,  344;186858,  314;190141,  328;193823,  368;197901,  407;201948,  404;205560,  361;208780,  322;212001,  322;215717,  371;219993,  427;224475,  448;228629,  415;232190,  356;235418,  322;238739,  332;242564,  382;246714,  415;250869,  415;254796,  392;258477,  368;262264,  378;266308,  404;270555,  424;274658,  410;278441,  378;281989,  354;285583,  359;289494,  391;293559,  406;297577,  401;301309,  373;304931,  362;308729,  379;312813,  408;317088,  427;321111,  402;324738,  362;328026,  328;331496,  347;335477,  398;339889,  441;344478,  458;348586,  410;352182,  359;355576,  339;359150,  357;363188,  403;367373,  418;371372,  399;374939,  356;378310,  337;381948,  363;386018,  407;390483,  446;394801,  431;398700,  389;402177,  347;405466,  328;409104,  363;413187,  408;417642,  445;422136,  449;426467,  433;430637,  417;434649,  401;438719,  407;442716,  399;446626,  391;450497,  387;454306,  380;458265,  395;462209,  394;    30,   30;462209,44376;466032,  382;469669,  363;473096,  342;476636,  354;480433,  379;484633,  420;489029,  439;493320,  429;497399,  407;501208,  380;505123,  391;509247,  412;513553,  430;517888,  433;521779,  389;525360,  358;528932,  357;532891,  395;537573,  468;542530,  495;547380,  485;551458,  407;554744,  328;557825,  308;561078,  325;565282,  420;570170,  488;575336,  516;580292,  495;584499,  420;588413,  391;592134,  372;596025,  389;600219,  419;604280,  406;608330,  405;611921,  359;615125,  320;617890,  276;620028,  213;622080,  205;623711,  163;625154,  144;626290,  113;626868,   57;627336,   46;627534,   19;627534,    0;627534,    0;627534,    0;627534,    0;627534,    0;626783,   75;626691,    9;626691,    0;626691,    0;626691,    0;626691,    0;626806,   11;626807,    0;626830,    2;626989,   15;627572,   58;628466,   89;629388,   92;630247,   85;630785,   53;631162,   37;631509,   34;631941,   43;632676,   73;633568,   89;634574,  100;635511,   93;636218,   70;636775,   55;637161,   38;637599,   43;638198,   59;638945,   74;639794,   84;640472,   67;640909,   43;641107,   19;641278,   17;641710,   43;642426,   71;643362,   93;644155,   79;644568,   41;644610,    4;644649,    3;644750,   10;645345,   59;646276,   93;647307,  103;648082,   77;648551,   46;648829,   27;649192,   36;649881,   68;650841,   96;651925,  108;652875,   95;653563,   68;654081,   51;654528,   44;655112,   58;655940,   82;656895,   95;657840,   94;658582,   74;659009,   42;659244,   23;659503,   25;660016,   51;660822,   80;661755,   93;662596,   84;663109,   51;663358,   24;663574,   21;664008,   43;664836,   82;665880,  104;666888,  100;667609,   72;667939,   33;668120,   18;668419,   29;669025,   60;669912,   88;670864,   95;671671,   80;672220,   54;672639,   41;673083,   44;673665,   58;674390,   72;675097,   70;675641,   54;675965,   32;676164,   19;676422,   25;676921,   49;677637,   71;678405,   76;679102,   69;679555,   45;679837,   28;680105,   26;680445,   34;680983,   53;681662,   67;682366,   70;682983,   61;683439,   45;683810,   37;684190,   38;684721,   53;685424,   70;686216,   79;686992,   77;687583,   59;688028,   44;688409,   38;688816,   40;689404,   58;690056,   65;690653,   59;691125,   47;691382,   25;691574,   19;691836,   26;692250,   41;692859,   60;693518,   65;694119,   60;694603,   48;694954,   35;695250,   29;695564,   31;695955,   39;696422,   46;696966,   54;697558,   59;698112,   55;698644,   53;699141,   49;699608,   46;700113,   50;700613,   50;701119,   50;701641,   52;702149,   50;702726,   57;703382,   65;704085,   70;704813,   72;705463,   65;706010,   54;706495,   48;706998,   50;707636,   63;708386,   75;709171,   78;709807,   63;710178,   37;710352,   17;710465,   11;710765,   30;711340,   57;712097,   75;712908,   81;713550,   64;714008,   45;714400,   39;714851,   45;715500,   64;716272,   77;717020,   74;717639,   61;718102,   46;718552,   45;719095,   54;719772,   67;720513,   74;721174,   66;721698,   52;722093,   39;722475,   38;722956,   48;723541,   58;724183,   64;724752,   56;725207,   45;725649,   44;726138,   48;726749,   61;727478,   72;728151,   67;728696,   54;729087,   39;729342,   25;729649,   30;730100,   45;730728,   62;731490,   76;732198,   70;732768,   57;733154,   38;733401,   24;   300,  300;778273, 750000;  25,  603;"
-
-            if not raw_data:
-                logging.error("No data received for 5 seconds from device")
-                #self.session_stats['failed_episodes'] += 1
-                continue
-            if raw_data: break
+        # Wait for episode to complete and receive data; back off between empty receives
+        # so a device that stays silent does not turn this into a tight loop
+        raw_data = None
+        backoff = RECEIVE_RETRY_BACKOFF
+        for attempt in range(1, RECEIVE_MAX_RETRIES + 1):
+            raw_data = self.udp_client.receive_data()
+            if raw_data:
+                break
+            logging.error("No data received from device (attempt %d/%d)", attempt, RECEIVE_MAX_RETRIES)
+            if attempt < RECEIVE_MAX_RETRIES:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, RECEIVE_RETRY_BACKOFF_MAX)
+        
+        if not raw_data:
+            self._stats[OUTCOME_FAILED] += 1
+            return None
         
-        logging.info(f"Received raw data: {raw_data[:100]}...")  # Log first 100 chars
+        logging.info("Received raw data: %s...", raw_data[:100].decode('ascii', 'replace'))
         
         # Parse the data
         parsed_data = self.data_processor.parse_raw_data(raw_data)
         if not parsed_data:
             logging.error("Failed to parse received data")
-            self.session_stats['failed_episodes'] += 1
+            self._stats[OUTCOME_FAILED] += 1
             return None
         
         # Create filling session for reward calculation
-        filling_session = self.data_processor.create_filling_session(parsed_data)
+        filling_session = self.data_processor.create_filling_session(parsed_data, self._session)
         if not filling_session:
             logging.error("Failed to create filling session")
-            self.session_stats['failed_episodes'] += 1
+            self._stats[OUTCOME_FAILED] += 1
             return None
         
         # Calculate reward
@@ -151,9 +201,8 @@ class RealWorldTester:
             method="standard"  # Use standard reward calculation
         )
         
-        # Add reward to parsed data
+        # Add reward to parsed data; the session itself is reused and stays in self._session
         parsed_data['reward'] = reward
-        parsed_data['filling_session'] = filling_session
         
         # Update statistics
         self._update_session_stats(parsed_data)
@@ -161,24 +210,99 @@ class RealWorldTester:
         # Save to database if connected
         self._save_episode_to_database(parsed_data)
         
-        logging.info(f"Episode completed - Final weight: {parsed_data['final_weight']}, "
-                    f"Reward: {reward:.2f}")
+        logging.info("Episode completed - Final weight: %s, Reward: %.2f",
+                     parsed_data['final_weight'], reward)
         
         return parsed_data
     
+    def _q_table_delta(self, q_table: Dict[Any, float]) -> Dict[Any, float]:
+        """
+        Return the Q-table entries that changed since the previous call.
+        
+        Storing only the changes keeps per-episode memory proportional to the update
+        size instead of the table size; the file handler rebuilds full tables on write.
+        """
+        prev_q_table = self._prev_q_table
+        delta = {key: value for key, value in q_table.items() if prev_q_table.get(key) != value}
+        prev_q_table.update(delta)
+        return delta
+    
+    @staticmethod
+    def _episodes_as_dicts(episodes: List[EpisodeInfo]) -> List[Dict[str, Any]]:
+        """Convert episode records to dicts, rebuilding full Q-tables from the stored diffs."""
+        q_table = {}
+        results = []
+        for episode in episodes:
+            if episode.q_value_is_delta:
+                q_table.update(episode.q_value)
+            else:
+                q_table = dict(episode.q_value)
+            # asdict copies the table, so later updates do not leak into earlier episodes
+            results.append(asdict(replace(episode, q_value=q_table, q_value_is_delta=False)))
+        return results
+    
+    @property
+    def session_stats(self) -> Dict[str, int]:
+        """Session statistics by name, built from the counter array when read."""
+        return dict(zip(SESSION_STAT_NAMES, self._stats.tolist()))
+    
     def _update_session_stats(self, episode_data: Dict[str, Any]) -> None:
         """Update session statistics."""
-        self.session_stats['total_episodes'] += 1
-        self.session_stats['successful_episodes'] += 1
-        
-        if episode_data['overflow_amount'] > 0:
-            self.session_stats['overflow_episodes'] += 1
-        elif episode_data['underflow_amount'] > 0:
-            self.session_stats['underflow_episodes'] += 1
-        else:
-            self.session_stats['safe_episodes'] += 1
+        is_over = episode_data['overflow_amount'] > 0
+        is_under = not is_over and episode_data['underflow_amount'] > 0
+        stats = self._stats
+        stats[OUTCOME_TOTAL] += 1
+        stats[OUTCOME_SUCCESS] += 1
+        stats[OUTCOME_OVERFLOW] += is_over
+        stats[OUTCOME_UNDERFLOW] += is_under
+        stats[OUTCOME_SAFE] += not (is_over or is_under)
+    
+    def _start_db_writer(self) -> None:
+        """Start the background database writer thread if it is not already running."""
+        if self._db_thread is not None and self._db_thread.is_alive():
+            return
+        self._db_stopping = False
+        self._db_thread = threading.Thread(target=self._db_writer_loop, name="db-writer", daemon=True)
+        self._db_thread.start()
+    
+    def _stop_db_writer(self) -> None:
+        """Let the writer thread drain the queued episodes, then wait for it to exit."""
+        if self._db_thread is None:
+            return
+        with self._db_queue_ready:
+            self._db_stopping = True
+            self._db_queue_ready.notify()
+        self._db_thread.join()
+        self._db_thread = None
+        if self._db_dropped_episodes:
+            logging.warning("%d episodes were dropped from the full database queue", self._db_dropped_episodes)
+    
+    def _db_writer_loop(self) -> None:
+        """Write queued episodes to the database until stopped and the queue is empty."""
+        _pin_current_thread(get_cpu_pinning()["db_writer_core"], "Database writer")
+        while True:
+            with self._db_queue_ready:
+                while not self._db_queue and not self._db_stopping:
+                    self._db_queue_ready.wait()
+                if not self._db_queue:
+                    break
+                episode_data = self._db_queue.popleft()
+            self._write_episode_to_database(episode_data)
     
     def _save_episode_to_database(self, episode_data: Dict[str, Any]) -> None:
+        """Queue episode for the background database writer."""
+        if self._db_thread is None:
+            # Writer not running (devices not connected through connect_devices); write inline
+            self._write_episode_to_database(episode_data)
+            return
+        with self._db_queue_ready:
+            # The deque drops its oldest entry on append when full
+            if len(self._db_queue) == self._db_queue.maxlen:
+                self._db_dropped_episodes += 1
+            self._db_queue.append(episode_data)
+            self._db_queue_ready.notify()
+    
+    def _write_episode_to_database(self, episode_data: Dict[str, Any]) -> None:
         """Save episode to database."""
         try:
             # Save original data
@@ -210,10 +334,10 @@ class RealWorldTester:
                     episode_stats = self.data_processor.get_episode_stats(episode_data)
                     self.db_handler.save_statistics(**episode_stats)
                     
-                    logging.info(f"Episode saved to database (IDs: {original_id}, {parsed_id})")
+                    logging.info("Episode saved to database (IDs: %s, %s)", original_id, parsed_id)
                 
         except Exception as e:
-            logging.error(f"Error saving episode to database: {e}")
+            logging.error("Error saving episode to database: %s", e)
     
     def run_agent_testing(self, agent, logger) -> List[Dict[str, Any]]:
         """
@@ -225,7 +349,8 @@ class RealWorldTester:
             initial_switch_point: Starting switch point (from DEFAULT_STARTING_SWITCH_POINT)
             
         Returns:
-            List of episode data dictionaries
+            List of episode dictionaries with the EpisodeInfo fields, as the visualizer expects;
+            q_value holds the full Q-table after each episode
         """
         if not self.connect_devices():
             logging.error("Failed to connect to devices")
@@ -234,23 +359,47 @@ class RealWorldTester:
         try:
             episodes = []    
             episode_num = 1
+            self._prev_q_table = {}
+            parquet_writer = None
+
+            # Loop-invariant lookups are bound once instead of per episode
+            quantization_step = self.data_processor.quantization_step
+            safe_min = self.reward_calculator.safe_weight_min * quantization_step
+            safe_max = self.reward_calculator.safe_weight_max * quantization_step
+            run_episode = self.run_episode
+            update_agent = self._resolve_agent_updater(agent)
+            send_switching_point = self.modbus_client.send_switching_point
+            write_to_text = self.file_handler.write_to_text
+            write_stdout = sys.stdout.write
+            output_paths = logger.get_output_paths()
+            q_values_path = output_paths['q_values_path']
+            
+            # Q-values are streamed to Parquet as episodes finish, so they survive an abrupt stop
+            if not PYARROW_AVAILABLE:
+                logging.warning("pyarrow not available, Q-values will only be written to Excel. Install with: pip install pyarrow")
+            elif any(isinstance(key, tuple) for key in agent.q_table):
+                logging.info("%s Q-table is keyed by (state, action), Q-values will not be streamed to Parquet",
+                             type(agent).__name__)
+            else:
+                parquet_writer = QValueParquetWriter(output_paths['parquet_path'])
 
             while True:
-                logging.info(f"Running episode {episode_num}")
+                logging.info("Running episode %d", episode_num)
                 
                 # Run episode (steps 2-5: device filling, data reception, parsing, reward calculation)
-                episode_data = self.run_episode()
+                episode_data = run_episode()
                 if episode_data:
-                    current_switch_point = episode_data['weight_sequence'][episode_data['weight_sequence'].index(-1) -1]
+                    # The switch marker index is recorded at parse time; no scan needed
+                    current_switch_point = int(episode_data['weight_sequence'][episode_data['switch_idx'] - 1])
                     # Step 6: Update agent with real-world episode data (exactly like training)
-                    filling_session = episode_data['filling_session']
-                    self._update_agent_with_episode(agent, filling_session, current_switch_point)
+                    filling_session = self._session
+                    update_agent(filling_session, current_switch_point)
                     #TODO: save to db after upate agent to save q_table
                     # Determine termination type
                     final_weight = episode_data['final_weight']
-                    if final_weight < self.reward_calculator.safe_weight_min * self.data_processor.quantization_step:
+                    if final_weight < safe_min:
                         termination_type = "underweight"
-                    elif final_weight > self.reward_calculator.safe_weight_max * self.data_processor.quantization_step:
+                    elif final_weight > safe_max:
                         termination_type = "overweight"
                     else:
                         termination_type = "safe"
@@ -264,42 +413,50 @@ class RealWorldTester:
                     # Determine explored switching point
                     explored_switch_point = next_switch_point if exploration_flag else None 
                     
-                    # Console output matching training format EXACTLY
-                    print(f"--- Episode {episode_num} ---")
-                    print(f"Experienced Switching Point: {current_switch_point}")
-                    print(f"Termination Type: {termination_type}")
-                    print(f"Model-Selected Next Switching Point: {model_selected_next_switch_point}")
-                    print(f"Explored Switching Point: {explored_switch_point}")
-                    print()
+                    # Console output matching training format EXACTLY, written in one call;
+                    # a TTY still flushes per line, piped output is flushed when testing ends
+                    write_stdout(
+                        f"--- Episode {episode_num} ---\n"
+                        f"Experienced Switching Point: {current_switch_point}\n"
+                        f"Termination Type: {termination_type}\n"
+                        f"Model-Selected Next Switching Point: {model_selected_next_switch_point}\n"
+                        f"Explored Switching Point: {explored_switch_point}\n"
+                        "\n"
+                    )
                     
-                    logging.info(f"Episode {episode_num + 1} completed - "
-                                f"Final weight: {episode_data['final_weight']}, "
-                                f"Reward: {episode_data['reward']:.2f}")
-                    episode_data = {
-                        'episode': episode_num + 1,
-                        'episode_num': episode_num + 1,  # For compatibility with desired plot format
-                        'switch_point': current_switch_point,
-                        'model_selected_switching_point': model_selected_next_switch_point,
-                        'explored_switching_point': explored_switch_point,
-                        'episode_length': len(episode_data),
-                        'final_weight': final_weight,
-                        'termination_type': termination_type,
-                        'exploration_rate': 0,
-                        'q_value': agent.q_table.copy(),
-                        'total_time': episode_data['total_time']
-                    }
+                    logging.info("Episode %d completed - Final weight: %s, Reward: %.2f",
+                                 episode_num + 1, episode_data['final_weight'], episode_data['reward'])
+                    episode_record = EpisodeInfo(
+                        episode_num=episode_num + 1,
+                        switch_point=current_switch_point,
+                        model_selected_switching_point=model_selected_next_switch_point,
+                        explored_switching_point=explored_switch_point,
+                        termination_type=termination_type,
+                        total_time=episode_data['total_time'],
+                        final_weight=final_weight,
+                        q_value=self._q_table_delta(agent.q_table),
+                        episode_length=filling_session.episode_length,
+                        exploration_rate=0,
+                        q_value_is_delta=True
+                    )
 
             
             
 
                     # Send switching point to device
-                    self.modbus_client.send_switching_point(next_switch_point)
-                    output_paths = logger.get_output_paths()
-                    self.file_handler.write_to_text(agent.q_table, output_paths['q_values_path'])
+                    send_switching_point(next_switch_point)
+                    write_to_text(agent.q_table, q_values_path)
                 
 
 
-                    episodes.append(episode_data)
+                    episodes.append(episode_record)
+                    if parquet_writer is not None:
+                        # A report failure must not stop the device loop
+                        try:
+                            parquet_writer.write_episode(episode_record)
+                        except Exception as e:
+                            logging.error("Error streaming Q-values to Parquet, streaming disabled: %s", e)
+                            parquet_writer = None
                     # Update current switch point for next episode
                     current_switch_point = next_switch_point
                     episode_num += 1
@@ -310,10 +467,22 @@ class RealWorldTester:
         except Exception as e:
             logging.error(f"Error during testing: {e}")
         finally:
-            self.file_handler.write_qvalue_updates_to_excel(episodes, output_paths['excel_path'])
+            sys.stdout.flush()
+            # Release the devices and the database writer before the reports, so a failing
+            # report cannot leave them running
             self.disconnect_devices()
+            if parquet_writer is not None:
+                try:
+                    parquet_writer.close()
+                except Exception as e:
+                    logging.error("Error closing Parquet file: %s", e)
+            if EXCEL_REPORT_ENABLED:
+                try:
+                    self.file_handler.write_qvalue_updates_to_excel(episodes, output_paths['excel_path'])
+                except Exception as e:
+                    logging.error("Error writing Excel report: %s", e)
             self._print_session_summary()
-            return episodes
+            return self._episodes_as_dicts(episodes)
         
     def run_manual_testing(self, switching_points: List[float]) -> List[Dict[str, Any]]:
         """
@@ -333,14 +502,14 @@ class RealWorldTester:
         
         try:
             for i, switching_point in enumerate(switching_points):
-                logging.info(f"Running episode {i + 1}/{len(switching_points)} "
-                           f"with switching point: {switching_point}")
+                logging.info("Running episode %d/%d with switching point: %s",
+                             i + 1, len(switching_points), switching_point)
                 
                 episode_data = self.run_episode(switching_point)
                 if episode_data:
                     episodes.append(episode_data)
                 else:
-                    logging.warning(f"Episode {i + 1} failed")
+                    logging.warning("Episode %d failed", i + 1)
                 
                 # Brief pause between episodes
                 time.sleep(1.0)
@@ -374,47 +543,87 @@ class RealWorldTester:
         
         logging.info("="*50)
     
-    def _update_agent_with_episode(self, agent, filling_session, switching_point):
+    def _resolve_agent_updater(self, agent):
         """
-        Update the RL agent with real-world episode data (step 6 of the testing loop).
+        Pick the update routine for the agent once, before the testing loop.
         
         Args:
             agent: RL agent to update
-            filling_session: FillingSession object from real episode
-            switching_point: Switching point that was used
-        """
-        try:
-            # Different agents need different update methods
-            agent_type = type(agent).__name__
             
-            if agent_type == "QLearningAgent":  # MAB agent
-                # MAB: Direct Q-value update with episode reward
-                episode_length = filling_session.episode_length
-                final_weight = filling_session.final_weight
-                reward = self.reward_calculator.calculate_reward(episode_length, final_weight, method="mab")
-                agent._update_q_value(switching_point, reward)
-                logging.info(f"MAB agent updated: Q({switching_point}) with reward {reward:.2f}")
-                
-            elif agent_type in ["MonteCarloAgent", "TDAgent", "StandardQLearningAgent"]:
-                # MC/TD/Q-Learning: Episode-based learning using FillingSession
-                episode_length, final_weight = agent.train_episode(switching_point)
-                logging.info(f"{agent_type} updated with episode: length={episode_length}, weight={final_weight}")
-                
-            else:
-                logging.warning(f"Unknown agent type: {agent_type}, skipping update")
-                
-        except Exception as e:
-            logging.error(f"Error updating agent with episode: {e}")
+        Returns:
+            Callable (filling_session, switching_point) that updates the agent with
+            real-world episode data (step 6 of the testing loop)
+        """
+        agent_type = type(agent).__name__
+        calculate_reward = self.reward_calculator.calculate_reward
+        
+        def update_mab(filling_session, switching_point):
+            # MAB: Direct Q-value update with episode reward
+            reward = calculate_reward(filling_session.episode_length, filling_session.final_weight, method="mab")
+            agent._update_q_value(switching_point, reward)
+            logging.info("MAB agent updated: Q(%s) with reward %.2f", switching_point, reward)
+        
+        def update_episodic(filling_session, switching_point):
+            # MC/TD/Q-Learning: Episode-based learning using FillingSession
+            episode_length, final_weight = agent.train_episode(switching_point)
+            logging.info("%s updated with episode: length=%s, weight=%s", agent_type, episode_length, final_weight)
+        
+        def skip_update(filling_session, switching_point):
+            logging.warning("Unknown agent type: %s, skipping update", agent_type)
+        
+        # Different agents need different update methods
+        update = {
+            "QLearningAgent": update_mab,  # MAB agent
+            "MonteCarloAgent": update_episodic,
+            "TDAgent": update_episodic,
+            "StandardQLearningAgent": update_episodic,
+        }.get(agent_type, skip_update)
+        update_exploration_rate = getattr(agent, '_update_exploration_rate', None)
+        
+        def update_agent(filling_session, switching_point):
+            try:
+                update(filling_session, switching_point)
+            except Exception as e:
+                logging.error("Error updating agent with episode: %s", e)
             
-        # Update exploration rate if decay is enabled
-        if hasattr(agent, '_update_exploration_rate'):
-            agent._update_exploration_rate()
-            logging.debug(f"Exploration rate: {agent.exploration_rate:.3f}")
+            # Update exploration rate if decay is enabled
+            if update_exploration_rate is not None:
+                update_exploration_rate()
+                logging.debug("Exploration rate: %.3f", agent.exploration_rate)
+        
+        return update_agent
+    
+    def _pin_io_thread(self) -> None:
+        """Pin the calling thread to RL_IO_CORE for the testing loop, keeping its previous CPU mask."""
+        core = get_cpu_pinning()["io_core"]
+        if core is None or self._saved_affinity is not None:
+            return
+        # sched_getaffinity exists wherever sched_setaffinity does; otherwise pinning warns below
+        saved_affinity = os.sched_getaffinity(0) if hasattr(os, 'sched_getaffinity') else None
+        if not _pin_current_thread(core, "I/O"):
+            return
+        self._saved_affinity = saved_affinity
+        if os.geteuid() == 0:
+            os.nice(IO_THREAD_NICE)
+    
+    def _unpin_io_thread(self) -> None:
+        """Undo _pin_io_thread so the reports and later work are not confined to the I/O core."""
+        if self._saved_affinity is None:
+            return
+        try:
+            os.sched_setaffinity(0, self._saved_affinity)
+        except OSError as e:
+            logging.warning("Could not restore I/O thread CPU affinity: %s", e)
+        if os.geteuid() == 0:
+            os.nice(-IO_THREAD_NICE)
+        self._saved_affinity = None
     
     def disconnect_devices(self) -> None:
         """Disconnect from all devices."""
         logging.info("Disconnecting from devices...")
         self.udp_client.close()
         self.modbus_client.close()
+        self._stop_db_writer()
         self.db_handler.close()
+        self._unpin_io_thread()
         logging.info("All devices disconnected")
\ No newline at end of file
@@ -2,11 +2,15 @@
 TCP client for receiving real filling data from physical device.
 """
 
+import selectors
 import socket
 import time
 import logging
 from typing import Optional
-from config import DEFAULT_TCP_TIMEOUT
+from config import (
+    DEFAULT_TCP_TIMEOUT, UDP_MAX_DATAGRAM_SIZE, RECEIVE_BUFFER_SIZE,
+    TCP_NODELAY_ENABLED, TCP_SOCKET_BUFFER_SIZE, TCP_QUICKACK_ENABLED, TCP_BUSY_POLL_US
+)
 
 
 class TCPClient:
@@ -25,6 +29,9 @@ class TCPClient:
         self.port = port
         self.client_socket = None
         self.timeout = timeout
+        # Receive buffer reused across episodes; doubled whenever an episode fills it
+        self._rxbuf = bytearray(RECEIVE_BUFFER_SIZE)
+        self._rxview = memoryview(self._rxbuf)
         
     def connect(self) -> bool:
         """
@@ -35,6 +42,7 @@ class TCPClient:
         """
         try:
             self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._configure_socket()
             self.client_socket.connect((self.ip, self.port))
             self.client_socket.settimeout(self.timeout)
             logging.info(f"Connected to TCP device at {self.ip}:{self.port}")
@@ -48,6 +56,27 @@ class TCPClient:
             self.client_socket = None
             return False
     
+    def _configure_socket(self) -> None:
+        """Apply latency and buffer options; buffer sizes must be set before connecting."""
+        sock = self.client_socket
+        if TCP_NODELAY_ENABLED:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if TCP_SOCKET_BUFFER_SIZE:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, TCP_SOCKET_BUFFER_SIZE)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, TCP_SOCKET_BUFFER_SIZE)
+        self._quickack()
+        if TCP_BUSY_POLL_US and hasattr(socket, 'SO_BUSY_POLL'):
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BUSY_POLL, TCP_BUSY_POLL_US)
+            except OSError as e:
+                # Raising the busy-poll time above the system default needs CAP_NET_ADMIN
+                logging.debug(f"SO_BUSY_POLL not applied: {e}")
+    
+    def _quickack(self) -> None:
+        """Re-arm TCP_QUICKACK; the kernel clears it again after ACKing, so it is set after every recv."""
+        if TCP_QUICKACK_ENABLED and hasattr(socket, 'TCP_QUICKACK'):
+            self.client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+    
     def _send_test_message(self) -> None:
         """Send initial test message to device."""
         try:
@@ -57,25 +86,30 @@ class TCPClient:
         except Exception as e:
             logging.error(f"Failed to send test message: {e}")
     
-    def receive_data(self) -> Optional[str]:
+    def receive_data(self) -> Optional[bytes]:
         """
         Receive filling episode data from device.
         
         Returns:
-            Raw data string if received, None if timeout or error
+            Raw ASCII bytes if received (decoding is left to the parser, as for UDPClient),
+            None if timeout or error
         """
         if not self.client_socket:
             logging.error("TCP client not connected")
             return None
             
-        buffer = []
+        # Raw bytes are received in place and copied out once at the end
+        offset = 0
         last_received_time = time.time()
         
         while True:
+            if offset == len(self._rxbuf):
+                self._grow_receive_buffer()
             try:
-                data = self.client_socket.recv(4096)
-                if data:
-                    buffer.append(data.decode('ascii'))
+                received = self.client_socket.recv_into(self._rxview[offset:])
+                if received:
+                    offset += received
+                    self._quickack()
                     last_received_time = time.time()  # Reset timer
                 else:
                     break  # End of transmission
@@ -90,7 +124,13 @@ class TCPClient:
                 logging.error(f"Error receiving TCP data: {e}")
                 return None
         
-        return ''.join(buffer) if buffer else None
+        return bytes(self._rxview[:offset]) if offset else None
+    
+    def _grow_receive_buffer(self) -> None:
+        """Double the receive buffer; the view must be released before the bytearray can be resized."""
+        self._rxview.release()
+        self._rxbuf.extend(bytes(len(self._rxbuf)))
+        self._rxview = memoryview(self._rxbuf)
     
     def close(self) -> None:
         """Close TCP connection."""
@@ -106,13 +146,17 @@ class UDPClient:
         self.port = port
         self.client_socket = None
         self.timeout = timeout  
+        # Readiness is awaited with a selector instead of socket timeouts, so idle waits
+        # do not raise and catch an exception per expiry
+        self._selector = selectors.DefaultSelector()
 
     def connect(self) -> bool:
         try:
             self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             self.client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.client_socket.bind(("192.168.0.1", self.port))
-            self.client_socket.settimeout(self.timeout)  
+            self.client_socket.setblocking(False)
+            self._selector.register(self.client_socket, selectors.EVENT_READ)
             self.send_test_message()
             
             print(f"Dinleniyor: {"192.168.0.1"}:{self.port}")
@@ -135,27 +179,48 @@ class UDPClient:
             logging.error(f"Failed to send messa")
             print("Failed to send messa", {e})
 
-    def receive_data(self, timeout=1) -> Optional[str]:
-        buffer = []
+    def receive_data(self, timeout=1) -> Optional[bytes]:
+        """
+        Receive one episode: wait up to self.timeout seconds for the first datagram,
+        then keep reading until no datagram arrives for `timeout` seconds.
+        Returns the raw ASCII bytes; decoding is left to the parser.
+        """
+        # Datagrams are received straight into one preallocated buffer
+        buffer = bytearray(RECEIVE_BUFFER_SIZE)
+        nbytes = 0
         last_received_time = time.time()
         if not self.client_socket:
             raise RuntimeError("Call connect() first. I am not connected to UDP")
         
         while True:
-            try:
-                data, addr = self.client_socket.recvfrom(4096)
-                msg = data.decode('ascii', errors='replace')
-                buffer.append(msg)
-                logging.info(f"Received <- {addr} : {msg}")
-                last_received_time = time.time()
-            except socket.timeout:
-                if time.time() - last_received_time >= timeout:
-                    break
+            idle_limit = timeout if nbytes else self.timeout
+            remaining = idle_limit - (time.time() - last_received_time)
+            if remaining <= 0 or not self._selector.select(remaining):
+                break
             
+            # Drain every datagram already queued before waiting again
+            while True:
+                # Keep room for a full datagram so none is ever cut off
+                if len(buffer) - nbytes < UDP_MAX_DATAGRAM_SIZE:
+                    buffer.extend(bytes(len(buffer)))
+                try:
+                    with memoryview(buffer) as view:
+                        received, addr = self.client_socket.recvfrom_into(view[nbytes:])
+                except BlockingIOError:
+                    break
+                nbytes += received
+                logging.debug("Received <- %s : %d bytes", addr, received)
+            last_received_time = time.time()
         
-        return ''.join(buffer) if buffer else None
+        if not nbytes:
+            return None
+        with memoryview(buffer) as view:
+            return bytes(view[:nbytes])
 
     def close(self) -> None:
         if self.client_socket:
+            self._selector.unregister(self.client_socket)
             self.client_socket.close()
+            # A closed socket cannot be unregistered again, so a repeated close() becomes a no-op
+            self.client_socket = None
             logging.info("UDP socket closed.")
@@ -0,0 +1,225 @@
+"""
+Minimal streaming .xlsx writer for the Q-value report.
+Emits worksheet XML directly with lxml's xmlfile and packages the workbook
+without going through openpyxl's cell objects.
+"""
+
+import zipfile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Border positions used in style descriptors, in the order they are written to styles.xml
+ROW_POSITIONS = ('top', 'mid', 'bot')
+COL_POSITIONS = ('left', 'mid', 'right')
+
+# Style descriptor: (border_key, bold, centered, fill_name)
+StyleDescriptor = Tuple[Tuple[str, str], bool, bool, Optional[str]]
+
+
+def column_letter(index: int) -> str:
+    """Convert a 1-based column index to its Excel letter (1 -> A, 27 -> AA)."""
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _workbook_xml(sheet_name: str) -> str:
+    """Build workbook.xml for a single-sheet workbook."""
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+        f'<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+
+
+def _styles_xml(styles: List[StyleDescriptor], fill_colors: Dict[str, str]) -> str:
+    """
+    Build styles.xml containing one cellXfs entry per distinct style descriptor.
+
+    Args:
+        styles: Distinct style descriptors in the order their ids were assigned (id = index + 1)
+        fill_colors: Fill name to RGB hex color mapping
+    """
+    fill_names = list(fill_colors)
+    fill_ids = {name: idx + 2 for idx, name in enumerate(fill_names)}  # 0 and 1 are reserved
+    border_keys = [(r, c) for r in ROW_POSITIONS for c in COL_POSITIONS]
+    border_ids = {key: idx + 1 for idx, key in enumerate(border_keys)}  # 0 is the empty border
+
+    fills = ['<fill><patternFill patternType="none"/></fill>',
+             '<fill><patternFill patternType="gray125"/></fill>']
+    fills += [
+        f'<fill><patternFill patternType="solid"><fgColor rgb="FF{fill_colors[name]}"/>'
+        f'<bgColor rgb="FF{fill_colors[name]}"/></patternFill></fill>'
+        for name in fill_names
+    ]
+
+    def side(tag, thick):
+        return f'<{tag} style="{"thick" if thick else "thin"}"><color rgb="FF000000"/></{tag}>'
+
+    borders = ['<border><left/><right/><top/><bottom/><diagonal/></border>']
+    borders += [
+        '<border>'
+        + side('left', c == 'left') + side('right', c == 'right')
+        + side('top', r == 'top') + side('bottom', r == 'bot')
+        + '<diagonal/></border>'
+        for r, c in border_keys
+    ]
+
+    xfs = ['<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>']
+    for border_key, bold, centered, fill in styles:
+        fill_id = fill_ids[fill] if fill is not None else 0
+        attrs = (f'numFmtId="0" fontId="{1 if bold else 0}" fillId="{fill_id}" '
+                 f'borderId="{border_ids[border_key]}" xfId="0" applyFont="1" applyBorder="1"')
+        if fill is not None:
+            attrs += ' applyFill="1"'
+        if centered:
+            xfs.append(f'<xf {attrs} applyAlignment="1">'
+                       '<alignment horizontal="center" vertical="center"/></xf>')
+        else:
+            xfs.append(f'<xf {attrs}/>')
+
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<styleSheet xmlns="{MAIN_NS}">'
+        '<fonts count="2">'
+        '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+        '<font><b/><sz val="12"/><name val="Calibri"/><family val="2"/></font>'
+        '</fonts>'
+        f'<fills count="{len(fills)}">{"".join(fills)}</fills>'
+        f'<borders count="{len(borders)}">{"".join(borders)}</borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        f'<cellXfs count="{len(xfs)}">{"".join(xfs)}</cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    )
+
+
+def write_xlsx(file_path: str,
+               sheet_name: str,
+               rows: Sequence[Sequence],
+               styles: Sequence[Sequence[Optional[StyleDescriptor]]],
+               fill_colors: Dict[str, str],
+               column_width: float,
+               merged_ranges: Sequence[str] = (),
+               freeze_row: int = 0,
+               compresslevel: int = 1) -> None:
+    """
+    Write a single-sheet .xlsx file by streaming worksheet XML.
+
+    Args:
+        file_path: Output .xlsx path
+        sheet_name: Worksheet name
+        rows: Row-major cell values (None for empty cells)
+        styles: Style descriptors parallel to rows (None for unstyled cells)
+        fill_colors: Fill name to RGB hex color mapping used by the descriptors
+        column_width: Width applied to every used column
+        merged_ranges: Ranges such as "A1:B1" to merge
+        freeze_row: Number of top rows to freeze (0 for none)
+        compresslevel: DEFLATE level; low levels trade a little size for much less CPU
+    """
+    if not LXML_AVAILABLE:
+        raise ImportError("lxml package required for streaming xlsx output")
+
+    total_columns = max((len(row) for row in rows), default=0)
+    col_letters = [column_letter(i) for i in range(1, total_columns + 1)]
+    style_ids: Dict[StyleDescriptor, int] = {}
+
+    tag = lambda name: f"{{{MAIN_NS}}}{name}"
+    row_tag, c_tag, v_tag, is_tag, t_tag = tag('row'), tag('c'), tag('v'), tag('is'), tag('t')
+
+    with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as archive:
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES_XML)
+        archive.writestr('_rels/.rels', ROOT_RELS_XML)
+        archive.writestr('xl/workbook.xml', _workbook_xml(sheet_name))
+        archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS_XML)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as stream, etree.xmlfile(stream, encoding='utf-8') as xf:
+            xf.write_declaration(standalone=True)
+            with xf.element(tag('worksheet'), nsmap={None: MAIN_NS}):
+                if freeze_row:
+                    sheet_view = etree.Element(tag('sheetView'), workbookViewId="0")
+                    etree.SubElement(sheet_view, tag('pane'), ySplit=str(freeze_row),
+                                     topLeftCell=f"A{freeze_row + 1}", activePane="bottomLeft", state="frozen")
+                    sheet_views = etree.Element(tag('sheetViews'))
+                    sheet_views.append(sheet_view)
+                    xf.write(sheet_views)
+                if total_columns:
+                    cols = etree.Element(tag('cols'))
+                    etree.SubElement(cols, tag('col'), min="1", max=str(total_columns),
+                                     width=str(column_width), customWidth="1")
+                    xf.write(cols)
+
+                with xf.element(tag('sheetData')):
+                    for row_num, (values, row_styles) in enumerate(zip(rows, styles), start=1):
+                        row_str = str(row_num)
+                        with xf.element(row_tag, r=row_str):
+                            for col_letter, value, style in zip(col_letters, values, row_styles):
+                                if value is None and style is None:
+                                    continue
+                                cell = etree.Element(c_tag, r=col_letter + row_str)
+                                if style is not None:
+                                    style_id = style_ids.get(style)
+                                    if style_id is None:
+                                        style_id = style_ids[style] = len(style_ids) + 1
+                                    cell.set('s', str(style_id))
+                                if isinstance(value, str):
+                                    cell.set('t', 'inlineStr')
+                                    etree.SubElement(etree.SubElement(cell, is_tag), t_tag).text = value
+                                elif value is not None:
+                                    etree.SubElement(cell, v_tag).text = repr(value)
+                                xf.write(cell)
+
+                if merged_ranges:
+                    merge_cells = etree.Element(tag('mergeCells'), count=str(len(merged_ranges)))
+                    for cell_range in merged_ranges:
+                        etree.SubElement(merge_cells, tag('mergeCell'), ref=cell_range)
+                    xf.write(merge_cells)
+
+        # Style ids are assigned while streaming the sheet, so styles.xml is written last
+        archive.writestr('xl/styles.xml', _styles_xml(list(style_ids), fill_colors))